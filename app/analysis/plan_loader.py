@@ -4,25 +4,61 @@ import logging
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 
-from pydantic import BaseModel, field_validator, ValidationError
+from pydantic import BaseModel, Field, PrivateAttr, field_validator, ValidationError
 
-from app.core.config import MergedConfig
+from app.core.config import MergedConfig, SafeLoader
 
 
 logger = logging.getLogger(__name__)
 
 
+# 参数值的格式类型: 2 个数字的列表为一个点，4 个数字的列表为两个点，其余按原样显示
+_COORD_TAGS = {2: 'point', 4: 'rect'}
+
+_PARAM_FORMATTERS = {
+    'point': lambda v: f"({v[0]},{v[1]})",
+    'rect': lambda v: f"({v[0]},{v[1]})-({v[2]},{v[3]})",
+    'scalar': str,
+}
+
+
+def _param_tag(value: Any) -> str:
+    if isinstance(value, list):
+        tag = _COORD_TAGS.get(len(value))
+        if tag and all(isinstance(x, (int, float)) for x in value):
+            return tag
+    return 'scalar'
+
+
 class ActionModel(BaseModel):
     """定义单个动作的结构"""
     action_type: str  # e.g., 'deploy', 'skill', 'recall'
-    params: Optional[Dict[str, Any]] = None
-    comment: Optional[str] = None # Added comment field
+    # 两个字段总是存在，使用方可以直接访问 action.params / action.comment，无需 hasattr/getattr 兜底
+    params: Dict[str, Any] = Field(default_factory=dict)
+    comment: str = "" # Added comment field
+
+    @field_validator('params', 'comment', mode='before')
+    @classmethod
+    def none_as_default(cls, v, info):
+        """验证器：计划文件中显式写出的 null 视为未填写"""
+        if v is None:
+            return {} if info.field_name == 'params' else ""
+        return v
+
+    # (参数名, 格式类型, 参数值)，在解析计划时确定一次，格式化时无需再做类型判断。
+    # params 本身保持不变，Commander 仍以 **params 调用控制器。
+    _tagged_params: List[tuple] = PrivateAttr(default_factory=list)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._tagged_params = [(k, _param_tag(v), v) for k, v in self.params.items()]
 
 
 class FrameActionGroupModel(BaseModel):
     """定义单个触发帧及其包含的所有动作"""
     trigger_frame: int
     actions: List[ActionModel]
+    # format_action_summary() 的缓存结果
+    _summary: Optional[str] = PrivateAttr(default=None)
 
     @field_validator('trigger_frame')
     @classmethod
@@ -41,6 +77,24 @@ class FrameActionGroupModel(BaseModel):
         return v
 
 
+def _format_action(action: ActionModel) -> str:
+    detail = action.action_type.capitalize()
+    if action._tagged_params:
+        params_text = ", ".join(f"{k}:{_PARAM_FORMATTERS[tag](v)}" for k, tag, v in action._tagged_params)
+        detail += f" ({params_text})"
+    return detail
+
+
+def format_action_summary(action_group: FrameActionGroupModel) -> str:
+    """
+    返回动作组的摘要文本，例如 "Deploy (start_pos:(100,200), direction:up); Skill (pos:(300,400))"。
+    结果会缓存在动作组对象上，重复调用不会再次格式化。
+    """
+    if action_group._summary is None:
+        action_group._summary = "; ".join(_format_action(action) for action in action_group.actions)
+    return action_group._summary
+
+
 class PlanLoader:
     def __init__(self, config: MergedConfig):
         """
@@ -74,7 +128,7 @@ class PlanLoader:
 
         try:
             with filepath.open('r', encoding='utf-8') as f:
-                raw_data = yaml.safe_load(f)
+                raw_data = yaml.load(f, Loader=SafeLoader)
         except yaml.YAMLError as e:
             raise ValueError(f"'{filepath.name}' 文件 YAML 格式错误: {e}")
 
@@ -1,3 +1,4 @@
+import json
 import time
 import signal
 import logging
@@ -13,8 +14,9 @@ from multiprocessing.synchronize import Event as SyncEvent
 
 from pynput import mouse, keyboard
 
-from app.core.config import MergedConfig
+from app.core.config import MergedConfig, SafeDumper
 from app.core.ipc.double_shared_buffer import DoubleSharedBuffer, FrameData
+from app.core.ipc.spsc_ring_buffer import RingSender
 from app.utils.windows_utils import WindowHelper
 
 
@@ -35,11 +37,17 @@ class ActionRecorder:
     负责监听用户输入，关联帧数，并记录为结构化动作。
     """
 
+    # 事件通道已满时，后台发送线程等待界面取走数据的最长时间 (秒)
+    EVENT_PUT_TIMEOUT = 2.0
+
     def __init__(self, config: MergedConfig, frame_buffer: DoubleSharedBuffer, output_plan_path: str, event_queue: Optional[multiprocessing.Queue] = None, final_plan_queue: Optional[multiprocessing.Queue] = None):
         self.config = config
         self.frame_buffer = frame_buffer
         self.output_plan_path = output_plan_path
         self.event_queue = event_queue
+        # 鼠标和键盘监听器运行在两个不同的线程中，都会录制动作。事件统一交给一个发送线程写入通道，
+        # 保证环形缓冲区只有一个生产者线程，同时监听器回调 (Windows 上即输入钩子线程) 永远不会被阻塞
+        self._event_sender = RingSender(event_queue, self.EVENT_PUT_TIMEOUT, self._on_event_dropped) if event_queue else None
         self.final_plan_queue = final_plan_queue 
         self.target_w = 1920
         self.target_h = 1080
@@ -78,6 +86,8 @@ class ActionRecorder:
             logger.critical(f"无法启动录制器，因为连接窗口失败: {e}")
             return
 
+        if self._event_sender:
+            self._event_sender.start()
         self.mouse_listener = mouse.Listener(on_click=self._on_click)
         self.keyboard_listener = keyboard.Listener(on_press=self._on_press)
         
@@ -95,6 +105,9 @@ class ActionRecorder:
             self.mouse_listener.stop()
         if self.keyboard_listener:
             self.keyboard_listener.stop()
+        # 监听器停止后不会再有新的动作，等待已录制的事件全部送出
+        if self._event_sender:
+            self._event_sender.stop()
             
         self.is_running = False
         logger.info("已停止监听。")
@@ -176,8 +189,14 @@ class ActionRecorder:
         }
         self.recorded_actions.append(action)
         logger.info(f"动作录制: {action}")
-        if self.event_queue:
-            self.event_queue.put(action)
+        if self._event_sender:
+            # 参数的显示文本在录制进程中格式化好，UI 线程无需再做 JSON 序列化。
+            # 界面表格中的动作就是最终保存的计划，因此通道已满时由发送线程等待界面取走数据，而不是直接丢弃
+            self._event_sender.send({**action, "params_text": json.dumps(params)})
+
+    def _on_event_dropped(self, event: dict):
+        action = {k: v for k, v in event.items() if k != "params_text"}
+        logger.error(f"录制动作未能发送到界面 (事件通道已满)，保存的计划中将缺少该动作，请手动补录: {action}")
 
     def _handle_press(self, button: mouse.Button, pos: Tuple[int, int], frame_data: FrameData):
         """处理鼠标按下事件"""
@@ -280,7 +299,7 @@ class ActionRecorder:
         
         try:
             with open(self.output_plan_path, 'w', encoding='utf-8') as f:
-                yaml.dump(final_plan, f, allow_unicode=True, sort_keys=False, indent=2)
+                yaml.dump(final_plan, f, Dumper=SafeDumper, allow_unicode=True, sort_keys=False, indent=2)
             logger.info(f"作战计划已成功保存到: {self.output_plan_path}")
         except Exception as e:
             logger.error(f"保存作战计划失败: {e}", exc_info=True)
@@ -345,4 +364,6 @@ def run_recorder_process(
             recorder.stop()
         if frame_buffer:
             frame_buffer.close()
+        if event_queue:
+            event_queue.close()
         logger.info("Recorder 进程已关闭。")
\ No newline at end of file
@@ -52,7 +52,8 @@ class Commander:
             controller_class: 要使用的控制器类 (例如 MumuMacroController)。
             controller_kwargs: 实例化控制器时所需的参数。
             stop_event: 用于外部停止进程的同步事件。
-            event_queue: (可选) 用于向UI等外部进程发送状态和事件的队列。
+            event_queue: (可选) 用于向UI等外部进程发送状态和事件的队列，任何提供 `put()` / `close()`
+                         的对象均可 (例如 `multiprocessing.Queue` 或 `SpscRingBuffer`)。
         """
         self.config = config
         self.frame_ipc_params = frame_ipc_params
@@ -112,8 +113,7 @@ class Commander:
                     continue
                 
                 # 获取当前帧数
-                frame_data = self.frame_buffer.get()
-                current_total_frames = frame_data.total_frames
+                current_total_frames = self.frame_buffer.peek_total_frames()
                 
                 if next_action_index >= len(self.plan):
                     self._set_state(CommanderState.DONE)
@@ -195,7 +195,7 @@ class Commander:
                         
                         method = getattr(self.controller, action.action_type, None)
                         if method:
-                            params = action.params or {}
+                            params = action.params
                             method(**params)
                             logger.info(f"  - 已执行: {action.action_type}({params})")
                         else:
@@ -249,6 +249,8 @@ class Commander:
         
         if self.frame_buffer:
             self.frame_buffer.close()
+        if self.event_queue:
+            self.event_queue.close()
         logger.info("Commander 进程已关闭。")
 
 
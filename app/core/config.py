@@ -1,18 +1,30 @@
+import json
 import yaml
+import functools
 
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 
 from pydantic import BaseModel, Field, ConfigDict
 
+# 优先使用 libyaml 的 C 实现，未编译 libyaml 时回退到纯 Python 实现
+# 项目中其他读写 YAML 的地方也应从这里导入 SafeLoader / SafeDumper
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+# 探测到的模拟器分辨率按实例索引缓存在这里，避免每次启动都为了读取分辨率而额外启动一次截图引擎
+RESOLUTION_CACHE_PATH = Path.home() / ".cache" / "zhou" / "resolution.json"
 
 class SettingsConfig(BaseModel):
     fps: int = Field(60, gt=0, description = "期望FPS")
     perf_test_duration: float = Field(5.0, gt=0, description = "FPS测试任务测试时长")
     log_level: str = Field('INFO', description = "Logging level")
     active_calibration_profile: Optional[str] = Field(None, description="Ruler进程要使用的校准文件名")
+    affinity_enabled: bool = Field(False, description="是否将截图/Ruler/Commander 进程绑定到固定 CPU 核心并提升优先级")
 
 class MumuConfig(BaseModel):
     mumu_base_path: str = Field(..., description = "MUMU模拟器地址")
@@ -20,6 +32,8 @@ class MumuConfig(BaseModel):
     mumu_instance_index: int = Field(0, ge=0, description = "MUMU模拟器实例索引")
     mumu_render_class: str = Field("nemuwin", description = "MuMu模拟器渲染子窗口的类名")
     device_serial: str = Field("127.0.0.1:16384", description="adb 连接的地址")
+    capture_width: Optional[int] = Field(None, gt=0, description="截图宽度, 留空则在运行时从模拟器获取")
+    capture_height: Optional[int] = Field(None, gt=0, description="截图高度, 留空则在运行时从模拟器获取")
     
     
 
@@ -27,6 +41,45 @@ class MergedConfig(SettingsConfig, MumuConfig):
     """一个包含所有配置字段的统一模型"""
     model_config = ConfigDict(extra='allow')
 
+    @property
+    def cached_resolution(self) -> Optional[Tuple[int, int]]:
+        """
+        返回已知的截图分辨率 (width, height)。
+        配置中显式指定的 `capture_width` / `capture_height` 优先，其次是磁盘缓存，都没有时返回 None。
+        """
+        if self.capture_width and self.capture_height:
+            return self.capture_width, self.capture_height
+        return load_cached_resolution(self.mumu_instance_index)
+
+
+def _read_resolution_cache() -> Dict[str, Any]:
+    try:
+        cache = json.loads(RESOLUTION_CACHE_PATH.read_text(encoding='utf-8'))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def load_cached_resolution(instance_index: int) -> Optional[Tuple[int, int]]:
+    """读取指定模拟器实例缓存的分辨率 (width, height)，没有缓存或缓存内容无效时返回 None。"""
+    entry = _read_resolution_cache().get(str(instance_index))
+    # 缓存文件可能被手动修改过，只接受由两个正整数组成的列表
+    if not (isinstance(entry, list) and len(entry) == 2
+            and all(type(v) is int and v > 0 for v in entry)):
+        return None
+    width, height = entry
+    return width, height
+
+
+def save_cached_resolution(instance_index: int, width: int, height: int):
+    """将指定模拟器实例的分辨率写入磁盘缓存。"""
+    cache = _read_resolution_cache()
+    if cache.get(str(instance_index)) == [width, height]:
+        return
+    cache[str(instance_index)] = [width, height]
+    RESOLUTION_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    RESOLUTION_CACHE_PATH.write_text(json.dumps(cache), encoding='utf-8')
+
 def load_and_merge_configs(config_dir: Path) -> Dict[str, Any]:
     """
     从指定目录加载所有 .yaml 文件, 并进行合并
@@ -37,15 +90,19 @@ def load_and_merge_configs(config_dir: Path) -> Dict[str, Any]:
 
     for config_file in config_dir.glob('*.yaml'):
         with open(config_file, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
+            data = yaml.load(f, Loader=SafeLoader)
             if data:
                 merged_data.update(data)
     return merged_data
 
 
+@functools.lru_cache(maxsize=1)
 def get_config() -> MergedConfig:
     """
     加载、合并、验证并返回应用程序的配置对象
+
+    结果会被缓存，重复调用返回同一个对象，调用方不应修改它。
+    配置文件被修改后需要先调用 `get_config.cache_clear()` 才能重新加载。
     """
     config_path = PROJECT_ROOT / 'configs'
     merged_data = load_and_merge_configs(config_path)
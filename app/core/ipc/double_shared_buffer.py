@@ -1,6 +1,8 @@
 import ctypes
 import logging
+import contextlib
 
+from typing import Optional
 from multiprocessing import shared_memory
 
 
@@ -57,6 +59,9 @@ class DoubleSharedBuffer:
             b. 根据读取到的索引，直接从对应的**读取槽** (例如，`槽[0]`) 拷贝数据。
             c. 返回数据的**一个副本**。这确保了消费者获取到的数据在其后续处理过程中不会被生产者再次修改，保证了数据的一致性。
         -   由于读取的槽永远不会是生产者当前正在写入的槽，消费者永远不会读到"撕裂"（只写了一半）的数据。
+        -   只关心最新状态、以固定节奏轮询的消费者 (例如 UI) 可以改用 `.get_latest()`：
+            它直接在槽上比较时间戳，只有在生产者发布了新状态时才拷贝并返回，否则返回 `None`。
+        -   只需要帧数的消费者可以调用 `.peek_total_frames()`，直接从槽中读取单个字段，不产生任何拷贝。
 
     4.  **资源清理**:
         -   所有使用该缓冲区的进程在退出时都**必须**调用 `close()` 来释放自己与共享内存的连接。
@@ -89,6 +94,8 @@ class DoubleSharedBuffer:
         
         # 仅生产者使用的内部状态
         self._producer_write_idx = 0
+        # 仅消费者使用的内部状态: 上一次通过 get_latest() 取走的状态的时间戳
+        self._consumer_last_timestamp = None
         self._attach_or_create()
 
     def _attach_or_create(self):
@@ -107,24 +114,39 @@ class DoubleSharedBuffer:
                 self.data_views.append(FrameData.from_buffer(shm.buf))
 
             if self._is_creator:
-                # 初始化状态
-                self.latest_idx_view.value = 0
-                for view in self.data_views:
-                    view.total_frames = -1
-                    view.logical_frame = -1
-                    view.cycle_index = -1
-                    view.total_frames_in_cycle = -1
-                    view.timestamp = 0.0
+                self.reset()
 
         except Exception as e:
             logger.error(f"创建或附加 SharedState 内存失败 (prefix='{self.name_prefix}'). "
                          f"创建者模式={self._is_creator}. 错误: {e}", exc_info=True)
             if self._is_creator:
-                self.close_and_unlink()
-            else:
-                self.close()
+                self._unlink_created()
+            self.close()
             raise
 
+    def _unlink_created(self):
+        """内部方法，创建中途失败时只注销本实例已经成功创建的段，不会误删名称冲突时已存在的同名段。"""
+        for shm in [self._idx_shm, *self._data_shms]:
+            if shm:
+                with contextlib.suppress(FileNotFoundError):
+                    shm.unlink()
+
+
+    def reset(self):
+        """
+        [创建者调用] 将索引和两个数据槽恢复到初始状态，使同一组共享内存可以在多次运行之间复用。
+        调用时不能有任何生产者或消费者正在使用此缓冲区。
+        """
+        self.latest_idx_view.value = 0
+        for view in self.data_views:
+            view.total_frames = -1
+            view.logical_frame = -1
+            view.cycle_index = -1
+            view.total_frames_in_cycle = -1
+            view.timestamp = 0.0
+        self._producer_write_idx = 0
+        self._consumer_last_timestamp = None
+
 
     def set(self, total_frames: int, logical_frame: int, cycle_index: int, total_frames_in_cycle: int, timestamp: float):
         """
@@ -156,13 +178,38 @@ class DoubleSharedBuffer:
         latest_view = self.data_views[idx]
         
         # 3. 返回一个数据副本，确保线程安全和数据一致性
-        return FrameData(
-            latest_view.total_frames,
-            latest_view.logical_frame,
-            latest_view.cycle_index,
-            latest_view.total_frames_in_cycle,
-            latest_view.timestamp
-        )
+        return self._copy_view(latest_view)
+
+
+    def peek_total_frames(self) -> int:
+        """
+        [消费者调用] 直接从最新的槽中读取 `total_frames`，不拷贝整个 `FrameData`。
+        适用于只关心帧数、需要高频轮询的消费者 (例如 Commander 的主循环)。
+        """
+        return self.data_views[self.latest_idx_view.value].total_frames
+
+
+    def get_latest(self) -> Optional[FrameData]:
+        """
+        [消费者调用] 仅当生产者发布了新状态时才返回其副本，否则返回 `None`。
+        只读取一次共享索引，并直接在槽上比较时间戳，没有新状态时不产生任何拷贝。
+        """
+        latest_view = self.data_views[self.latest_idx_view.value]
+        if latest_view.timestamp == self._consumer_last_timestamp:
+            return None
+
+        data = self._copy_view(latest_view)
+        self._consumer_last_timestamp = data.timestamp
+        return data
+
+
+    @staticmethod
+    def _copy_view(view: FrameData) -> FrameData:
+        """
+        内部方法，拷贝一个共享内存槽中的数据。
+        `FrameData` 是定长的紧凑结构体，整块 memcpy 一次即可，无需逐字段读取再构造。
+        """
+        return FrameData.from_buffer_copy(view)
 
 
     def close(self):
@@ -0,0 +1,263 @@
+import time
+import queue
+import pickle
+import struct
+import logging
+import threading
+
+from typing import Any, Callable, Optional
+from multiprocessing import shared_memory
+
+
+logger = logging.getLogger(__name__)
+
+
+class SpscRingBuffer:
+    """
+    一个基于 `multiprocessing.shared_memory` 实现的单生产者/单消费者 (SPSC) 无锁环形缓冲区。
+    用于替代 `multiprocessing.Queue` 传递低频、小体积的事件 (例如 Commander / Recorder 发往 UI 的事件)，
+    省去了 `Queue` 的后台 feeder 线程、管道读写和锁。
+
+    ### 设计模式
+
+    1.  **创建者/附加者 (Creator/Attacher) 模式**:
+        -   **创建者**: 由主进程以 `create=True` 模式实例化，负责创建操作系统级的共享内存段。
+        -   **附加者**: 子进程以 `create=False` 模式实例化，通过相同的 `name_prefix` 附加到已存在的内存段上。
+        -   实例可以直接作为 `multiprocessing.Process` 的参数传递，子进程在反序列化时会自动以附加者身份连接。
+
+    2.  **单生产者/单消费者**:
+        -   只允许**一个线程**调用 `.put()`，**一个线程**调用 `.pop_batch()`。限制针对的是线程而不是进程:
+            同一进程内的多个线程并发调用 `.put()` 会读到相同的 `head`，互相覆盖记录并使 `head` 乱序发布。
+            有多个线程产生数据时，应通过 `RingSender` 交给唯一的后台线程写入。
+        -   `head` (写位置) 只由生产者写入，`tail` (读位置) 只由消费者写入，因此无需任何锁。
+        -   两者各自独占一条 64 字节的缓存行，避免生产者和消费者互相使对方的缓存行失效。
+
+    ### 内存布局
+
+        [0, 8)      head: 已写入的总字节数 (uint64，单调递增)
+        [64, 72)    tail: 已读取的总字节数 (uint64，单调递增)
+        [128, ...)  数据区: 长度为 `capacity` 的环形字节区
+
+    每条记录由 4 字节的长度头 (uint32) 和 pickle 序列化后的负载组成，记录可以跨越数据区末尾回绕。
+
+    ### 工作流程
+
+    1.  **生产者**: 调用 `.put(item)`。
+        a. 序列化数据，检查剩余空间。默认在空间不足时立即丢弃该条数据并返回 `False`，生产者不会被阻塞；
+           不允许丢失数据的通道 (例如录制动作) 可以传入 `timeout`，等待消费者释放空间。
+        b. 将长度头和负载写入 `head` 之后的空闲区域。
+        c. 数据写完后，**原子性地**更新 `head`，让消费者看到新记录。
+
+    2.  **消费者**: 调用 `.pop_batch(out)`。
+        a. 读取一次 `head`，依次解析 `tail` 到 `head` 之间的记录并追加到 `out` 中。
+        b. 处理完后**原子性地**更新 `tail`，释放已读取的空间。
+
+    3.  **资源清理**:
+        -   所有使用该缓冲区的进程在退出时都应该调用 `close()`。
+        -   只有**创建者**进程在最后才应该调用 `close_and_unlink()`。
+    """
+
+    _COUNTER = struct.Struct('<Q')
+    _LENGTH = struct.Struct('<I')
+    _HEAD_OFFSET = 0
+    _TAIL_OFFSET = 64
+    _DATA_OFFSET = 128
+
+    def __init__(self, name_prefix: str, capacity: int = 256 * 1024, create: bool = False):
+        """
+        初始化环形缓冲区。
+
+        Args:
+            name_prefix (str): 一个唯一的名称前缀，用于标识共享内存段。
+                               创建者和附加者必须使用完全相同的 `name_prefix`。
+            capacity (int):    数据区的字节数。
+            create (bool):     `True` 表示作为创建者创建共享内存，`False` 表示作为附加者连接到已存在的共享内存。
+        """
+        if not name_prefix:
+            raise ValueError("`name_prefix` 不能为空。")
+        if capacity <= self._LENGTH.size:
+            raise ValueError("`capacity` 过小。")
+
+        self.name_prefix = name_prefix
+        self.capacity = capacity
+        self._is_creator = create
+        self._shm: shared_memory.SharedMemory = None
+
+        try:
+            self._shm = shared_memory.SharedMemory(
+                name=f"{self.name_prefix}_ring", create=self._is_creator, size=self._DATA_OFFSET + self.capacity
+            )
+            if self._is_creator:
+                self.reset()
+        except Exception as e:
+            logger.error(f"创建或附加 SpscRingBuffer 内存失败 (prefix='{self.name_prefix}'). "
+                         f"创建者模式={self._is_creator}. 错误: {e}", exc_info=True)
+            # 只注销本实例已经成功创建的段，名称冲突时不能误删已存在的同名段
+            if self._is_creator and self._shm:
+                self._shm.unlink()
+            self.close()
+            raise
+
+    def __reduce__(self):
+        # 传递给子进程时，子进程以附加者身份重新连接同一块共享内存
+        return (self.__class__, (self.name_prefix, self.capacity, False))
+
+    def reset(self):
+        """
+        [创建者调用] 清空缓冲区，使同一块共享内存可以在多次运行之间复用。
+        调用时不能有任何生产者或消费者正在使用此缓冲区。
+        """
+        self._COUNTER.pack_into(self._shm.buf, self._HEAD_OFFSET, 0)
+        self._COUNTER.pack_into(self._shm.buf, self._TAIL_OFFSET, 0)
+
+    # 等待空间时两次检查之间的休眠时长 (秒)
+    _PUT_RETRY_INTERVAL = 0.001
+
+    def put(self, item, timeout: float = 0.0) -> bool:
+        """
+        [生产者调用] 写入一条数据。
+
+        Args:
+            item:            任意可 pickle 的数据。
+            timeout (float): 空间不足时最多等待多少秒。默认为 0，即空间不足时立即丢弃该条数据。
+
+        Returns:
+            bool: 写入成功返回 `True`；等待超时 (或记录大于整个缓冲区) 时丢弃该条数据并返回 `False`。
+        """
+        payload = pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL)
+        record_size = self._LENGTH.size + len(payload)
+
+        buf = self._shm.buf
+        head = self._COUNTER.unpack_from(buf, self._HEAD_OFFSET)[0]
+        tail = self._COUNTER.unpack_from(buf, self._TAIL_OFFSET)[0]
+        if record_size > self.capacity - (head - tail):
+            deadline = time.monotonic() + timeout if record_size <= self.capacity else 0.0
+            while record_size > self.capacity - (head - tail):
+                if time.monotonic() >= deadline:
+                    logger.warning(f"SpscRingBuffer 空间不足 (prefix: {self.name_prefix})，丢弃一条 {record_size} 字节的数据。")
+                    return False
+                time.sleep(self._PUT_RETRY_INTERVAL)
+                tail = self._COUNTER.unpack_from(buf, self._TAIL_OFFSET)[0]
+
+        # 1. 写入长度头和负载
+        self._write(head, self._LENGTH.pack(len(payload)))
+        self._write(head + self._LENGTH.size, payload)
+
+        # 2. **原子操作**: 发布新的写位置，让消费者看到这条记录
+        self._COUNTER.pack_into(buf, self._HEAD_OFFSET, head + record_size)
+        return True
+
+    def pop_batch(self, out: list, max_items: int = 64) -> int:
+        """
+        [消费者调用] 取出最多 `max_items` 条已写入的数据并追加到 `out` 中，返回取出的条数。此操作不会阻塞。
+        """
+        buf = self._shm.buf
+        head = self._COUNTER.unpack_from(buf, self._HEAD_OFFSET)[0]
+        tail = self._COUNTER.unpack_from(buf, self._TAIL_OFFSET)[0]
+
+        count = 0
+        while tail != head and count < max_items:
+            length = self._LENGTH.unpack(self._read(tail, self._LENGTH.size))[0]
+            out.append(pickle.loads(self._read(tail + self._LENGTH.size, length)))
+            tail += self._LENGTH.size + length
+            count += 1
+
+        if count:
+            # **原子操作**: 发布新的读位置，释放已读取的空间
+            self._COUNTER.pack_into(buf, self._TAIL_OFFSET, tail)
+        return count
+
+    def discard_all(self) -> int:
+        """
+        [消费者调用] 丢弃所有尚未读取的数据 (令 `tail = head`)，返回丢弃的字节数。
+        用于读取出错 (例如记录损坏) 后重新与生产者同步，而不必放弃整个通道。
+        """
+        buf = self._shm.buf
+        head = self._COUNTER.unpack_from(buf, self._HEAD_OFFSET)[0]
+        tail = self._COUNTER.unpack_from(buf, self._TAIL_OFFSET)[0]
+        self._COUNTER.pack_into(buf, self._TAIL_OFFSET, head)
+        return head - tail
+
+    def _write(self, pos: int, data: bytes):
+        """内部方法，将数据写入环形数据区，必要时在末尾回绕。"""
+        start = pos % self.capacity
+        first = min(len(data), self.capacity - start)
+        base = self._DATA_OFFSET
+        self._shm.buf[base + start:base + start + first] = data[:first]
+        if first < len(data):
+            self._shm.buf[base:base + len(data) - first] = data[first:]
+
+    def _read(self, pos: int, size: int) -> bytes:
+        """内部方法，从环形数据区读取数据，必要时在末尾回绕。"""
+        start = pos % self.capacity
+        first = min(size, self.capacity - start)
+        base = self._DATA_OFFSET
+        data = bytes(self._shm.buf[base + start:base + start + first])
+        if first < size:
+            data += bytes(self._shm.buf[base:base + size - first])
+        return data
+
+    def close(self):
+        """关闭当前进程对共享内存的连接。"""
+        if self._shm:
+            self._shm.close()
+            self._shm = None
+
+    def close_and_unlink(self):
+        """关闭连接并请求销毁共享内存段 (仅由创建者调用)。"""
+        self.close()
+        if self._is_creator:
+            logger.info(f"创建者进程正在注销 SpscRingBuffer 共享内存 (prefix: {self.name_prefix}).")
+            try:
+                shared_memory.SharedMemory(name=f"{self.name_prefix}_ring").unlink()
+            except FileNotFoundError:
+                pass
+
+
+class RingSender:
+    """
+    将多个线程产生的数据交给一个后台线程写入 `SpscRingBuffer`。
+
+    -   环形缓冲区始终只有这一个生产者线程，满足单生产者的要求。
+    -   `.send()` 只是放入进程内的无界队列，永远不会阻塞调用方 (例如 pynput 的输入钩子回调)；
+        缓冲区已满时的等待 (`put_timeout`) 只发生在后台线程中。
+    -   等待超时仍无法写入的数据会交给 `on_drop` 处理，默认只记录一条错误日志。
+    """
+
+    _STOP = object()
+
+    def __init__(self, ring: SpscRingBuffer, put_timeout: float = 0.0,
+                 on_drop: Optional[Callable[[Any], None]] = None):
+        self.ring = ring
+        self.put_timeout = put_timeout
+        self.on_drop = on_drop
+        self._items = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动后台写入线程。"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"RingSender-{self.ring.name_prefix}", daemon=True)
+            self._thread.start()
+
+    def send(self, item):
+        """[任意线程调用] 提交一条数据，立即返回。"""
+        self._items.put(item)
+
+    def stop(self):
+        """写完已提交的所有数据后停止后台线程。"""
+        if self._thread is not None:
+            self._items.put(self._STOP)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            item = self._items.get()
+            if item is self._STOP:
+                return
+            if not self.ring.put(item, timeout=self.put_timeout):
+                if self.on_drop:
+                    self.on_drop(item)
+                else:
+                    logger.error(f"RingSender 写入超时 (prefix: {self.ring.name_prefix})，已丢弃一条数据。")
@@ -1,4 +1,7 @@
+import os
+import mmap
 import logging
+import contextlib
 
 import numpy as np
 
@@ -7,6 +10,9 @@ from multiprocessing import shared_memory
 
 logger = logging.getLogger(__name__)
 
+# x86-64 / ARM64 上常见的缓存行大小
+CACHE_LINE_SIZE = 64
+
 
 class TripleSharedBuffer:
     """
@@ -40,6 +46,7 @@ class TripleSharedBuffer:
             b. 它会"回收"消费者之前正在读取的旧缓冲区，作为自己下一个空闲缓冲区。
             c. 它会将自己之前的空闲缓冲区，作为下一个写入目标。
             d. 这个索引交换过程极快，且对消费者是立刻可见的。
+            e. 它会递增共享的"已发布帧计数" (`np_frame_counter`)，用于在外部统计生产者的真实帧率。
 
     3.  **消费者循环**:
         -   在一个高效的循环中，消费者不断地读取共享的"最新帧索引" (`np_latest_idx`) 的值。
@@ -75,7 +82,10 @@ class TripleSharedBuffer:
         self.dtype = dtype
         self.frame_size = int(np.prod(self.shape) * np.dtype(self.dtype).itemsize)
         self._is_creator = create
-        self._int_size = np.dtype(np.int32).itemsize
+        # 索引共享内存布局: [0, 4) 最新帧索引 (int32)，[64, 72) 已发布帧计数 (uint64)
+        # 两者各占一条缓存行: 消费者在热循环中轮询最新帧索引，递增帧计数不会再使它所在的缓存行失效
+        self._counter_offset = CACHE_LINE_SIZE
+        self._idx_shm_size = 2 * CACHE_LINE_SIZE
 
         # 共享内存对象句柄
         self.idx_shm = None      # 用于存储"最新帧索引"的共享内存对象
@@ -83,6 +93,8 @@ class TripleSharedBuffer:
 
         # 指向共享内存的 Numpy 数组视图
         self.np_latest_idx = None # 指向"最新帧索引"的 Numpy 数组
+        self.latest_idx_addr = None # "最新帧索引"的原始内存地址，供热循环通过 ctypes 指针直接读取
+        self.np_frame_counter = None # 指向"已发布帧计数"的 Numpy 数组，仅由生产者递增
         self.np_arrays = []       # 指向三个图像帧缓冲区的 Numpy 数组列表
 
         # 调用内部方法来创建或附加到共享内存
@@ -94,11 +106,7 @@ class TripleSharedBuffer:
 
         # 如果是创建者，则需要进行初始化设置
         if self._is_creator:
-            # 将"最新帧索引"初始化为2，确保消费者初始读取时不会与生产者冲突
-            self.np_latest_idx[0] = 2
-            # 将所有图像缓冲区填充为0，确保一个干净的初始状态
-            for arr in self.np_arrays:
-                arr.fill(0)
+            self.reset()
 
     def _attach_or_create_buffers(self):
         """
@@ -107,15 +115,21 @@ class TripleSharedBuffer:
         try:
             # 1. 设置用于"最新帧索引"的共享内存
             idx_name = f"{self.name_prefix}_latest_idx"
-            self.idx_shm = shared_memory.SharedMemory(name=idx_name, create=self._is_creator, size=self._int_size)
+            self.idx_shm = shared_memory.SharedMemory(name=idx_name, create=self._is_creator, size=self._idx_shm_size)
             # 创建一个 Numpy 数组视图，直接操作这块内存
             self.np_latest_idx = np.ndarray((1,), dtype=np.int32, buffer=self.idx_shm.buf)
+            self.latest_idx_addr = self.np_latest_idx.ctypes.data
+            self.np_frame_counter = np.ndarray((1,), dtype=np.uint64, buffer=self.idx_shm.buf, offset=self._counter_offset)
+            # 共享内存段按页映射，两个字段必然各自位于缓存行的起始位置
+            assert self.latest_idx_addr % CACHE_LINE_SIZE == 0
+            assert self.np_frame_counter.ctypes.data % CACHE_LINE_SIZE == 0
 
             # 2. 循环创建或附加三个图像帧缓冲区
             for i in range(3):
                 frame_name = f"{self.name_prefix}_buf_{i}"
                 shm = shared_memory.SharedMemory(name=frame_name, create=self._is_creator, size=self.frame_size)
                 self.frame_shms.append(shm)
+                self._advise_frame_pages(shm)
                 # 同样为每个图像缓冲区创建 Numpy 数组视图
                 self.np_arrays.append(np.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf))
 
@@ -124,11 +138,34 @@ class TripleSharedBuffer:
                          f"创建者模式={self._is_creator}. 错误: {e}", exc_info=True)
             # 如果在创建过程中失败，必须尝试清理已部分创建的资源
             if self._is_creator:
-                self.close_and_unlink()
-            else:
-                self.close()
+                self._unlink_created()
+            self.close()
             raise
 
+    def _unlink_created(self):
+        """
+        一个内部辅助方法，创建中途失败时只注销本实例已经成功创建的段。
+        名称冲突 (FileExistsError) 时，已存在的同名段属于别人，不能按名称把它们一并删除。
+        """
+        for shm in [self.idx_shm, *self.frame_shms]:
+            if shm:
+                with contextlib.suppress(FileNotFoundError):
+                    shm.unlink()
+
+    def reset(self):
+        """
+        [创建者调用] 将缓冲区恢复到刚创建时的初始状态，使同一组共享内存可以在多次运行之间复用。
+        调用时不能有任何生产者或消费者正在使用此缓冲区。
+        """
+        # 将"最新帧索引"初始化为2，确保消费者初始读取时不会与生产者冲突
+        self.np_latest_idx[0] = 2
+        self.np_frame_counter[0] = 0
+        self._producer_write_idx = 0
+        self._producer_free_idx = 1
+        # 将所有图像缓冲区填充为0，确保一个干净的初始状态
+        for arr in self.np_arrays:
+            arr.fill(0)
+
     def get_write_buffer(self) -> np.ndarray:
         """
         [生产者调用] 获取一个当前可以安全写入数据的缓冲区。
@@ -150,7 +187,10 @@ class TripleSharedBuffer:
         # 4. **原子操作**: 更新共享的"最新帧索引"，让所有消费者立刻看到新帧
         self.np_latest_idx[0] = new_latest
 
-        # 5. 更新生产者内部的指针，为下一次写入做准备
+        # 5. 递增已发布帧计数 (只有生产者写入，无需同步)
+        self.np_frame_counter[0] += 1
+
+        # 6. 更新生产者内部的指针，为下一次写入做准备
         self._producer_write_idx = new_write
         self._producer_free_idx = new_free
 
@@ -162,6 +202,40 @@ class TripleSharedBuffer:
         idx = self.np_latest_idx[0]
         return self.np_arrays[idx]
 
+    @staticmethod
+    def _advise_frame_pages(shm: shared_memory.SharedMemory):
+        """
+        一个内部辅助方法，为图像缓冲区的映射申请透明大页 (THP) 并预读页面。
+        1080p 的一帧约占 2000 个 4 KB 页面，生产者每帧整块写入时会频繁发生 TLB 缺失，
+        使用 2 MB 大页可以大幅减少所需的 TLB 项。仅在支持对应 madvise 选项的平台 (Linux) 上生效。
+        """
+        shm_mmap = getattr(shm, '_mmap', None)
+        if shm_mmap is None:
+            return
+        for advice_name in ('MADV_HUGEPAGE', 'MADV_WILLNEED'):
+            advice = getattr(mmap, advice_name, None)
+            if advice is not None:
+                with contextlib.suppress(OSError, ValueError):
+                    shm_mmap.madvise(advice)
+
+    def _release_frame_pages(self):
+        """
+        一个内部辅助方法，在销毁共享内存前提示内核丢弃图像缓冲区的页面。
+        三个缓冲区在 1080p 下共约 24 MB，测试或多次运行连续创建/销毁时，
+        这些页面可能在页缓存中滞留。仅在支持 madvise/posix_fadvise 的平台上生效，其余平台静默跳过。
+        """
+        for shm in self.frame_shms:
+            # CPython 在 POSIX 上通过 `_mmap` / `_fd` 持有映射和文件描述符
+            shm_mmap = getattr(shm, '_mmap', None)
+            if shm_mmap is not None and hasattr(mmap, 'MADV_DONTNEED'):
+                with contextlib.suppress(OSError, ValueError):
+                    shm_mmap.madvise(mmap.MADV_DONTNEED)
+
+            fd = getattr(shm, '_fd', -1)
+            if fd >= 0 and hasattr(os, 'posix_fadvise'):
+                with contextlib.suppress(OSError):
+                    os.posix_fadvise(fd, 0, shm.size, os.POSIX_FADV_DONTNEED)
+
     def close(self):
         """
         关闭当前进程对共享内存段的连接。
@@ -169,6 +243,8 @@ class TripleSharedBuffer:
         这不会销毁共享内存本身，只是断开当前进程的连接。
         """
         self.np_latest_idx = None
+        self.latest_idx_addr = None
+        self.np_frame_counter = None
         self.np_arrays.clear()
         
         if self.idx_shm:
@@ -181,6 +257,10 @@ class TripleSharedBuffer:
         关闭连接，并请求操作系统销毁共享内存段。
         此方法应该**仅由创建者进程**在所有子进程都结束后调用，以确保资源被彻底清理。
         """
+        # 在断开连接之前，提示内核尽快回收图像缓冲区占用的页面
+        if self._is_creator:
+            self._release_frame_pages()
+
         # 首先，关闭当前进程的连接
         self.close()
 
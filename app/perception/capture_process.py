@@ -5,7 +5,7 @@ import logging
 from typing import Type
 from multiprocessing.synchronize import Event as SyncEvent 
 
-from app.core.config import MergedConfig
+from app.core.config import MergedConfig, save_cached_resolution
 from app.core.ipc.triple_shared_buffer import TripleSharedBuffer
 from app.perception.engines.base import BaseCaptureEngine 
 
@@ -37,6 +37,19 @@ def run_capture_process(engine_class: Type[BaseCaptureEngine], config: MergedCon
         engine = engine_class(config)
         engine.start()
 
+        # 共享内存按缓存的分辨率创建，模拟器分辨率变化后需要更新缓存并由上层重新启动
+        if (engine.height, engine.width) != ipc_buffer.shape[:2]:
+            mismatch = (f"模拟器分辨率 {engine.width}x{engine.height} 与共享内存尺寸 "
+                        f"{ipc_buffer.shape[1]}x{ipc_buffer.shape[0]} 不一致")
+            if config.capture_width and config.capture_height:
+                # 配置中显式指定的分辨率优先于磁盘缓存，更新缓存无济于事，重新启动仍会失败
+                raise RuntimeError(
+                    f"{mismatch}。共享内存尺寸来自配置项 capture_width={config.capture_width} / "
+                    f"capture_height={config.capture_height}，请在 configs 目录的配置文件中修正这两项或将其留空。"
+                )
+            save_cached_resolution(config.mumu_instance_index, engine.width, engine.height)
+            raise RuntimeError(f"{mismatch}，已更新分辨率缓存，请重新启动。")
+
         buffer_size = engine.width * engine.height * 4
         temp_ctypes_buffer = (ctypes.c_ubyte * buffer_size)()
 
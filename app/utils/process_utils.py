@@ -0,0 +1,62 @@
+import os
+import sys
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+def pin_process(pid: int, cpu: int, high_priority: bool = True) -> bool:
+    """
+    将指定进程绑定到单个 CPU 核心，并可选地提升其调度优先级。
+
+    Windows 上通过 pywin32 设置亲和性掩码和 HIGH_PRIORITY_CLASS，
+    Linux 上使用 `os.sched_setaffinity` / `os.setpriority` (提升优先级通常需要额外权限，失败时仅记录警告)。
+
+    Args:
+        pid (int):            目标进程 ID。
+        cpu (int):            要绑定的 CPU 核心编号。
+        high_priority (bool): 是否同时提升进程优先级。
+
+    Returns:
+        bool: 亲和性设置成功时返回 True。核心不存在、平台不支持或设置失败时返回 False。
+    """
+    cpu_count = os.cpu_count() or 1
+    if cpu >= cpu_count:
+        logger.warning(f"CPU 核心 {cpu} 不存在 (共 {cpu_count} 个核心)，进程 {pid} 不做绑定。")
+        return False
+
+    try:
+        if sys.platform == "win32":
+            _pin_process_win32(pid, cpu, high_priority)
+        elif hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(pid, {cpu})
+            if high_priority:
+                try:
+                    os.setpriority(os.PRIO_PROCESS, pid, -5)
+                except PermissionError:
+                    logger.warning(f"没有权限提升进程 {pid} 的优先级，仅绑定 CPU 核心。")
+        else:
+            logger.warning("当前平台不支持设置 CPU 亲和性。")
+            return False
+    except Exception as e:
+        logger.error(f"为进程 {pid} 绑定 CPU 核心 {cpu} 失败: {e}")
+        return False
+
+    logger.info(f"进程 {pid} 已绑定到 CPU 核心 {cpu}。")
+    return True
+
+
+def _pin_process_win32(pid: int, cpu: int, high_priority: bool):
+    import win32api
+    import win32con
+    import win32process
+
+    access = win32con.PROCESS_SET_INFORMATION | win32con.PROCESS_QUERY_INFORMATION
+    handle = win32api.OpenProcess(access, False, pid)
+    try:
+        win32process.SetProcessAffinityMask(handle, 1 << cpu)
+        if high_priority:
+            win32process.SetPriorityClass(handle, win32process.HIGH_PRIORITY_CLASS)
+    finally:
+        win32api.CloseHandle(handle)
@@ -41,6 +41,18 @@ def initialized_engine(mumu_config):
             logger.info("关闭engine成功")
 
 
+@pytest.fixture(scope="module")
+def capture_buffer(initialized_engine):
+    """
+    提供一个与引擎生命周期相同的截图缓冲区，所有截图测试共用，避免重复分配。
+    分配后立即整体写零，提前触发缺页，使后续测试不再承担首次访问的开销。
+    """
+    buffer_size = initialized_engine.width * initialized_engine.height * 4
+    buffer = (ctypes.c_ubyte * buffer_size)()
+    ctypes.memset(buffer, 0, buffer_size)
+    return buffer
+
+
 def test_config_validity(mumu_config):
     """
     测试项 1: 验证配置文件的存在性和路径的真实性。
@@ -72,14 +84,11 @@ def test_engine_initialization(initialized_engine):
     logger.info(f"Test 'test_engine_initialization' PASSED. Resolution: {engine.width}x{engine.height}")
 
 
-def test_frame_capture(initialized_engine):
+def test_frame_capture(initialized_engine, capture_buffer):
     """
     测试项 3: 验证能否成功截图。
     """
-    # 指定内存
     engine = initialized_engine
-    buffer_size = engine.width * engine.height * 4
-    capture_buffer = (ctypes.c_ubyte * buffer_size)()
     
     # 内存初始状态
     buffer_view_np = np.frombuffer(capture_buffer, dtype=np.uint8)
@@ -97,7 +106,7 @@ def test_frame_capture(initialized_engine):
 
 
 @pytest.mark.performance
-def test_capture_performance_against_config(mumu_config, initialized_engine):
+def test_capture_performance_against_config(mumu_config, initialized_engine, capture_buffer):
     """
     测试项 4: 验证截图性能是否达到配置文件中指定的 FPS 要求（默认60fps）
     """
@@ -115,9 +124,6 @@ def test_capture_performance_against_config(mumu_config, initialized_engine):
     )
 
     # 开始截图
-    buffer_size = engine.width * engine.height * 4
-    capture_buffer = (ctypes.c_ubyte * buffer_size)()
-    
     frame_count = 0
     start_time = time.perf_counter()
 
@@ -0,0 +1,206 @@
+import time
+import pickle
+import logging
+import threading
+
+import pytest
+
+from multiprocessing import Process
+
+from app.core.ipc.spsc_ring_buffer import SpscRingBuffer, RingSender
+from tests.conftest import ring_producer_task
+
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] [%(processName)s] %(message)s')
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture
+def make_ring():
+    """
+    返回一个函数 `make(capacity)`，用于创建带有唯一 name_prefix 的 SpscRingBuffer，
+    测试结束后统一关闭并注销所有创建的缓冲区。
+    """
+    rings = []
+
+    def make(capacity=256 * 1024):
+        ring = SpscRingBuffer(f"pytest_ring_{time.time_ns()}", capacity=capacity, create=True)
+        rings.append(ring)
+        return ring
+
+    try:
+        yield make
+    finally:
+        for ring in rings:
+            ring.close_and_unlink()
+
+
+def _drain(ring, max_items=64):
+    items = []
+    ring.pop_batch(items, max_items=max_items)
+    return items
+
+
+def test_ring_round_trip(make_ring):
+    """写入的数据按顺序取出，pop_batch 遵守 max_items 上限。"""
+    ring = make_ring()
+    for i in range(10):
+        assert ring.put({"index": i})
+
+    assert _drain(ring, max_items=4) == [{"index": i} for i in range(4)]
+    assert _drain(ring) == [{"index": i} for i in range(4, 10)]
+    assert _drain(ring) == []
+
+
+def test_ring_records_wrap_past_end(make_ring):
+    """记录 (包括长度头和负载) 跨越数据区末尾回绕时仍能被完整读出。"""
+    ring = make_ring(capacity=64)
+    # 每条记录约 30 字节，写入总量远超容量，长度头和负载都会在不同位置跨越末尾
+    for i in range(50):
+        item = ("wrap", i)
+        assert ring.put(item), f"第 {i} 条记录写入失败"
+        assert _drain(ring) == [item]
+
+    head = SpscRingBuffer._COUNTER.unpack_from(ring._shm.buf, SpscRingBuffer._HEAD_OFFSET)[0]
+    assert head > 10 * ring.capacity, "写入总量不足，未覆盖回绕场景"
+
+
+def test_ring_put_returns_false_when_full(make_ring):
+    """空间不足时 put 丢弃数据并返回 False，消费后空间被释放。"""
+    ring = make_ring(capacity=128)
+    written = 0
+    while ring.put(written):
+        written += 1
+        assert written < 128, "缓冲区始终未满"
+
+    assert written > 0
+    # 过大的记录永远无法写入
+    assert not ring.put(b"x" * 256)
+
+    assert _drain(ring, max_items=written + 1) == list(range(written))
+    assert ring.put("after drain")
+    assert _drain(ring) == ["after drain"]
+
+
+def test_ring_put_waits_for_space_with_timeout(make_ring):
+    """传入 timeout 时，put 等待消费者释放空间后写入，而不是直接丢弃。"""
+    ring = make_ring(capacity=128)
+    written = 0
+    while ring.put(written):
+        written += 1
+
+    consumer = threading.Timer(0.05, _drain, args=(ring, written + 1))
+    consumer.start()
+    try:
+        assert ring.put("waited", timeout=5)
+    finally:
+        consumer.join()
+    assert _drain(ring) == ["waited"]
+
+
+def test_ring_put_timeout_expires_when_not_drained(make_ring):
+    """等待超时后 put 仍然丢弃数据并返回 False。"""
+    ring = make_ring(capacity=128)
+    while ring.put("fill"):
+        pass
+
+    start = time.monotonic()
+    assert not ring.put("late", timeout=0.05)
+    assert time.monotonic() - start >= 0.05
+
+
+def test_ring_pickle_attaches_to_same_memory(make_ring):
+    """pickle 后的实例以附加者身份连接到同一块共享内存。"""
+    ring = make_ring()
+    attached = pickle.loads(pickle.dumps(ring))
+    try:
+        assert not attached._is_creator
+        assert attached.capacity == ring.capacity
+        assert attached.put("from attacher")
+        assert _drain(ring) == ["from attacher"]
+    finally:
+        attached.close()
+
+
+def test_ring_attach_from_child_process(make_ring):
+    """环形缓冲区作为 Process 参数传入子进程，子进程写入的数据能被主进程读出。"""
+    ring = make_ring()
+    items = [{"type": "executing_action", "data": {"index": i}} for i in range(20)]
+
+    producer = Process(target=ring_producer_task, name="RingProducer", args=(ring, items))
+    producer.start()
+    producer.join(timeout=10)
+
+    assert producer.exitcode == 0, f"子进程写入环形缓冲区失败 (exitcode: {producer.exitcode})"
+    assert _drain(ring) == items
+
+
+def test_ring_reset(make_ring):
+    """reset 丢弃未读取的数据，并使整个容量可以重新使用。"""
+    ring = make_ring(capacity=128)
+    while ring.put("stale"):
+        pass
+
+    ring.reset()
+
+    assert _drain(ring) == []
+    assert ring.put("fresh")
+    assert _drain(ring) == ["fresh"]
+
+
+def test_ring_sender_serializes_multiple_producer_threads(make_ring):
+    """两个线程通过 RingSender 并发提交数据，所有记录都能被完整、按各线程内顺序读出。"""
+    ring = make_ring(capacity=4096)
+    sender = RingSender(ring, put_timeout=5)
+    sender.start()
+    per_thread = 5000
+
+    def produce(name):
+        for i in range(per_thread):
+            sender.send((name, i))
+
+    producers = [threading.Thread(target=produce, args=(name,)) for name in ("mouse", "keyboard")]
+    for producer in producers:
+        producer.start()
+
+    # 缓冲区远小于数据总量，消费者需要边读边释放空间
+    received = []
+    deadline = time.monotonic() + 30
+    while len(received) < 2 * per_thread and time.monotonic() < deadline:
+        if not ring.pop_batch(received):
+            time.sleep(0.001)
+
+    for producer in producers:
+        producer.join()
+    sender.stop()
+    ring.pop_batch(received)
+
+    assert len(received) == 2 * per_thread
+    for name in ("mouse", "keyboard"):
+        assert [i for n, i in received if n == name] == list(range(per_thread))
+
+
+def test_ring_sender_reports_dropped_items(make_ring):
+    """等待超时仍无法写入的数据交给 on_drop 处理。"""
+    ring = make_ring(capacity=128)
+    while ring.put("fill"):
+        pass
+
+    dropped = []
+    sender = RingSender(ring, put_timeout=0.01, on_drop=dropped.append)
+    sender.start()
+    sender.send("late")
+    sender.stop()
+
+    assert dropped == ["late"]
+
+def test_ring_discard_all_resyncs_consumer(make_ring):
+    """discard_all 丢弃未读取的数据，之后写入的数据可以正常读出。"""
+    ring = make_ring()
+    for i in range(5):
+        ring.put(i)
+
+    assert ring.discard_all() > 0
+    assert _drain(ring) == []
+    assert ring.put("next")
+    assert _drain(ring) == ["next"]
@@ -1,27 +1,34 @@
 import os
+import sys
 
 # 要排除的目录名
 EXCLUDE_DIRS = {".venv", ".git", "__pycache__", ".pytest_cache", "zhou"}
 
-def print_tree(root, prefix=""):
-    # 获取目录下的所有文件和文件夹
-    items = sorted(os.listdir(root))
-    items = [i for i in items if i not in EXCLUDE_DIRS]  # 过滤掉不需要的目录
+def print_tree(root, prefix="", lines=None):
+    # 顶层调用负责收集所有行，最后一次性写出
+    is_top_level = lines is None
+    if is_top_level:
+        lines = []
 
-    for index, name in enumerate(items):
-        path = os.path.join(root, name)
-        connector = "└── " if index == len(items) - 1 else "├── "
-        print(prefix + connector + name)
+    # 获取目录下的所有文件和文件夹，scandir 的 entry 自带文件类型，无需再 stat
+    with os.scandir(root) as it:
+        entries = sorted((e for e in it if e.name not in EXCLUDE_DIRS), key=lambda e: e.name)  # 过滤掉不需要的目录
 
-        if os.path.isdir(path):
+    for index, entry in enumerate(entries):
+        is_last = index == len(entries) - 1
+        connector = "└── " if is_last else "├── "
+        lines.append(prefix + connector + entry.name)
+
+        if entry.is_dir(follow_symlinks=False):
             # 如果是目录，继续递归
-            extension = "    " if index == len(items) - 1 else "│   "
-            print_tree(path, prefix + extension)
+            extension = "    " if is_last else "│   "
+            print_tree(entry.path, prefix + extension, lines)
 
+    if is_top_level and lines:
+        sys.stdout.write("\n".join(lines) + "\n")
 
-if __name__ == "__main__":
-    import sys
 
+if __name__ == "__main__":
     # 获取要展示的目录，默认为当前目录
     start_path = sys.argv[1] if len(sys.argv) > 1 else "."
 
@@ -1,16 +1,22 @@
+import os
 import time
 import logging
+import itertools
+import threading
 import multiprocessing
 import yaml # <-- Import yaml
+from queue import Empty
 from multiprocessing import Queue
+from multiprocessing.connection import wait
 from logging.handlers import QueueHandler
 from typing import List, Dict, Any
 
-from PySide6.QtCore import QObject, Signal
+from PySide6.QtCore import QObject, QRunnable, Signal
 
-from app.core.config import get_config, PROJECT_ROOT # <-- Import PROJECT_ROOT
+from app.core.config import get_config, save_cached_resolution, PROJECT_ROOT, SafeLoader, SafeDumper # <-- Import PROJECT_ROOT
 from app.core.ipc.triple_shared_buffer import TripleSharedBuffer
 from app.core.ipc.double_shared_buffer import DoubleSharedBuffer, FrameData
+from app.core.ipc.spsc_ring_buffer import SpscRingBuffer
 from app.perception.capture_process import run_capture_process
 from app.perception.engines.mumu import MumuCaptureEngine
 from app.analysis.ruler_process import run_ruler_process
@@ -19,14 +25,38 @@ from app.control.engine.mumu_macro_adapter import MumuMacroController
 from app.analysis.plan_loader import PlanLoader
 from app.analysis.recorder_process import run_recorder_process
 from app.analysis.calibrator import run_calibration, CalibrationManager
+from app.utils.process_utils import pin_process
 
 logger = logging.getLogger(__name__)
 
-
-class BackendManager:
+# 在支持 forkserver 的平台上，由常驻的 fork server 预先导入各后台进程的入口模块，
+# 每次开始运行/录制时直接 fork 出子进程，不再为每个子进程重新导入这些模块。
+# Windows 不支持 forkserver，退回默认的 spawn。
+# 进程、队列和事件都必须来自同一个上下文，因此本文件统一使用 `_mp_context` 创建它们。
+if "forkserver" in multiprocessing.get_all_start_methods():
+    _mp_context = multiprocessing.get_context("forkserver")
+    _mp_context.set_forkserver_preload([
+        "numpy",
+        "app.perception.capture_process",
+        "app.perception.engines.mumu",
+        "app.analysis.ruler_process",
+        "app.control.commander_process",
+    ])
+else:
+    _mp_context = multiprocessing.get_context()
+
+
+class BackendManager(QObject):
     """管理所有后台进程的生命周期。"""
+    # 运行模式的作战计划加载完成后发送一次，携带计划内容
+    plan_loaded = Signal(list)
+    # 开启 `affinity_enabled` 时各热点进程绑定的 CPU 核心，未列出的进程 (包括 UI) 由系统调度
+    CPU_AFFINITY = {"CaptureProcess": 2, "RulerProcess": 3, "CommanderProcess": 4}
+    # 共享内存名称中的进程内递增序号，配合 pid 保证名称唯一
+    _shm_seq = itertools.count()
 
     def __init__(self):
+        super().__init__()
         self.config = get_config()
         self.processes = []
         self.stop_event = None
@@ -39,47 +69,94 @@ class BackendManager:
         self.plan = None
 
     def _cleanup_ipc(self):
-        """一个专门用来清理 IPC 资源的辅助方法。"""
-        logger.info("正在清理上一次的 IPC 资源...")
+        """一个专门用来销毁 IPC 资源的辅助方法，仅在应用程序退出时调用。"""
+        logger.info("正在销毁 IPC 资源...")
         if self.image_buffer:
             self.image_buffer.close_and_unlink()
             self.image_buffer = None
         if self.frame_data_buffer:
             self.frame_data_buffer.close_and_unlink()
             self.frame_data_buffer = None
-        time.sleep(0.1)
-    
+        if self.commander_event_queue:
+            self.commander_event_queue.close_and_unlink()
+            self.commander_event_queue = None
+        if self.recorder_event_queue:
+            self.recorder_event_queue.close_and_unlink()
+            self.recorder_event_queue = None
+
+    def _create_shared(self, factory, kind: str):
+        """
+        以 `ark_<kind>_<pid>_<序号>` 为名称前缀调用 `factory(name_prefix)` 创建共享内存对象。
+        名称已被占用 (例如同 pid 的旧进程异常退出后遗留的段) 时换用下一个序号重试。
+        """
+        for _ in range(4):
+            name_prefix = f"ark_{kind}_{os.getpid()}_{next(self._shm_seq)}"
+            try:
+                return factory(name_prefix)
+            except FileExistsError:
+                logger.warning(f"共享内存名称 '{name_prefix}' 已被占用，换用下一个名称重试。")
+        raise FileExistsError(f"无法为 '{kind}' 找到可用的共享内存名称。")
+
+    def _reuse_or_create_ring(self, ring, kind: str) -> SpscRingBuffer:
+        """复位已有的事件环形缓冲区，不存在时才创建一个新的。"""
+        if ring:
+            ring.reset()
+            return ring
+        return self._create_shared(lambda name_prefix: SpscRingBuffer(name_prefix=name_prefix, create=True), kind)
+
     def _initialize_ipc(self):
-        """初始化图像和帧数据所需的IPC共享内存。"""
-        # 在创建新的 IPC 之前，先确保旧的被完全清理
-        self._cleanup_ipc()
+        """
+        准备图像和帧数据所需的IPC共享内存。
+        共享内存在多次运行之间复用，只复位其中的状态；仅当分辨率变化时才重新创建图像缓冲区。
+        """
         logger.info("正在初始化 IPC 资源...")
-        try:
-            temp_engine = MumuCaptureEngine(self.config)
-            temp_engine.start()
-            height, width = temp_engine.height, temp_engine.width
-        finally:
-            if 'temp_engine' in locals() and temp_engine:
-                temp_engine.stop()
-        logger.info(f"从模拟器获取到分辨率: {width}x{height}")
-
-        self.image_ipc_params = {
-            "name_prefix": f"ark_image_{time.time_ns()}",
-            "height": height, "width": width, "channels": 4,
-        }
-        self.image_buffer = TripleSharedBuffer(**self.image_ipc_params, create=True)
-
-        self.frame_ipc_params = {
-            "name_prefix": f"ark_frame_{time.time_ns()}",
-        }
-        self.frame_data_buffer = DoubleSharedBuffer(**self.frame_ipc_params, create=True)
-        logger.info("IPC 资源创建成功。")
+        if self.config.cached_resolution:
+            # 分辨率已知时不再启动临时引擎，省去一次与模拟器的握手
+            width, height = self.config.cached_resolution
+            logger.info(f"从缓存读取到分辨率: {width}x{height}")
+        else:
+            try:
+                temp_engine = MumuCaptureEngine(self.config)
+                temp_engine.start()
+                height, width = temp_engine.height, temp_engine.width
+            finally:
+                if 'temp_engine' in locals() and temp_engine:
+                    temp_engine.stop()
+            logger.info(f"从模拟器获取到分辨率: {width}x{height}")
+            save_cached_resolution(self.config.mumu_instance_index, width, height)
+
+        if self.image_buffer and self.image_buffer.shape == (height, width, 4):
+            self.image_buffer.reset()
+        else:
+            if self.image_buffer:
+                logger.info("分辨率发生变化，重新创建图像缓冲区。")
+                self.image_buffer.close_and_unlink()
+            self.image_buffer = self._create_shared(
+                lambda name_prefix: TripleSharedBuffer(name_prefix, height=height, width=width, channels=4, create=True),
+                "image",
+            )
+            self.image_ipc_params = {
+                "name_prefix": self.image_buffer.name_prefix,
+                "height": height, "width": width, "channels": 4,
+            }
+
+        if self.frame_data_buffer:
+            self.frame_data_buffer.reset()
+        else:
+            self.frame_data_buffer = self._create_shared(
+                lambda name_prefix: DoubleSharedBuffer(name_prefix, create=True),
+                "frame",
+            )
+            self.frame_ipc_params = {
+                "name_prefix": self.frame_data_buffer.name_prefix,
+            }
+        logger.info("IPC 资源准备就绪。")
 
     def start_run_mode(self, plan_name: str):
         """启动运行模式所需的所有进程。"""
-        self.stop_event = multiprocessing.Event()
-        self.commander_event_queue = multiprocessing.Queue()
+        self.stop_event = _mp_context.Event()
         self._initialize_ipc()
+        self.commander_event_queue = self._reuse_or_create_ring(self.commander_event_queue, "commander")
 
         # 加载计划
         plan_loader = PlanLoader(self.config)
@@ -88,9 +165,10 @@ class BackendManager:
             logger.error(f"作战计划 '{plan_name}' 为空或加载失败!")
             self.stop_all_processes()
             return
+        self.plan_loaded.emit(self.plan)
 
         # 1. Capture Process
-        capture_proc = multiprocessing.Process(
+        capture_proc = _mp_context.Process(
             target=run_capture_process,
             name="CaptureProcess",
             args=(MumuCaptureEngine, self.config, self.image_ipc_params, self.stop_event),
@@ -98,7 +176,7 @@ class BackendManager:
         self.processes.append(capture_proc)
 
         # 2. Ruler Process
-        ruler_proc = multiprocessing.Process(
+        ruler_proc = _mp_context.Process(
             target=run_ruler_process,
             name="RulerProcess",
             args=(self.config, self.image_ipc_params, self.frame_ipc_params, self.stop_event),
@@ -106,7 +184,7 @@ class BackendManager:
         self.processes.append(ruler_proc)
 
         # 3. Commander Process
-        commander_proc = multiprocessing.Process(
+        commander_proc = _mp_context.Process(
             target=run_commander_process,
             name="CommanderProcess",
             args=(
@@ -124,17 +202,18 @@ class BackendManager:
 
         for p in self.processes:
             p.start()
+        self._apply_affinity()
         logger.info(f"运行模式已启动，执行计划: {plan_name}")
 
     def start_record_mode(self, plan_name: str):
         """启动录制模式所需的所有进程。"""
-        self.stop_event = multiprocessing.Event()
-        self.recorder_event_queue = multiprocessing.Queue()
-        self.final_plan_queue = multiprocessing.Queue() # Initialize the new queue
+        self.stop_event = _mp_context.Event()
+        self.final_plan_queue = _mp_context.Queue() # Initialize the new queue
         self._initialize_ipc()
+        self.recorder_event_queue = self._reuse_or_create_ring(self.recorder_event_queue, "recorder")
 
         # 1. Capture Process
-        capture_proc = multiprocessing.Process(
+        capture_proc = _mp_context.Process(
             target=run_capture_process,
             name="CaptureProcess",
             args=(MumuCaptureEngine, self.config, self.image_ipc_params, self.stop_event),
@@ -142,7 +221,7 @@ class BackendManager:
         self.processes.append(capture_proc)
 
         # 2. Ruler Process
-        ruler_proc = multiprocessing.Process(
+        ruler_proc = _mp_context.Process(
             target=run_ruler_process,
             name="RulerProcess",
             args=(self.config, self.image_ipc_params, self.frame_ipc_params, self.stop_event),
@@ -150,7 +229,7 @@ class BackendManager:
         self.processes.append(ruler_proc)
 
         # 3. Recorder Process
-        recorder_proc = multiprocessing.Process(
+        recorder_proc = _mp_context.Process(
             target=run_recorder_process,
             name="RecorderProcess",
             args=(
@@ -167,8 +246,18 @@ class BackendManager:
 
         for p in self.processes:
             p.start()
+        self._apply_affinity()
         logger.info(f"录制模式已启动，计划名称: {plan_name}")
 
+    def _apply_affinity(self):
+        """按 `CPU_AFFINITY` 将已启动的热点进程绑定到固定核心，减少它们之间的相互抢占。"""
+        if not self.config.affinity_enabled:
+            return
+        for p in self.processes:
+            cpu = self.CPU_AFFINITY.get(p.name)
+            if cpu is not None:
+                pin_process(p.pid, cpu)
+
     def stop_all_processes(self):
         """停止所有正在运行的后台进程并清理资源。"""
         if self.stop_event:
@@ -188,8 +277,10 @@ class BackendManager:
         self.plan = None # 清理计划
         logger.info("所有后台进程已停止。")
 
+    def shutdown(self):
+        """停止所有后台进程并销毁共享内存，仅在应用程序退出时调用。"""
+        self.stop_all_processes()
         self._cleanup_ipc()
-
         logger.info("所有资源已清理。")
 
     def save_final_recorded_plan(self, plan_name: str, actions: List[Dict[str, Any]]):
@@ -201,6 +292,7 @@ class BackendManager:
             logger.error("final_plan_queue 未初始化，无法保存最终计划。")
 
     def reload_config(self):
+        get_config.cache_clear()
         self.config = get_config()
         return self.config
 
@@ -209,7 +301,7 @@ class BackendManager:
 
     def setup_log_queue(self) -> Queue:
         """配置日志系统，将日志重定向到队列。"""
-        self.log_queue = Queue()
+        self.log_queue = _mp_context.Queue()
         # 获取根 logger，并移除所有现有的 handlers
         root_logger = logging.getLogger()
         for handler in root_logger.handlers[:]:
@@ -222,14 +314,21 @@ class BackendManager:
         return self.log_queue
 
 
-class CalibrationWorker(QObject):
-    """在独立线程中执行校准任务。"""
+class CalibrationSignals(QObject):
+    """CalibrationWorker 的信号。QRunnable 不是 QObject，信号需要放在单独的对象上。"""
     calibration_progress = Signal(float)
     calibration_finished = Signal(str)
     calibration_failed = Signal(str)
 
+
+class CalibrationWorker(QRunnable):
+    """在线程池中执行校准任务。"""
+
     def __init__(self, config):
         super().__init__()
+        # 由调用方持有引用，避免线程池在 run() 结束后删除底层的 C++ 对象
+        self.setAutoDelete(False)
+        self.signals = CalibrationSignals()
         self.config = config
 
     def _update_active_profile_in_settings(self, new_profile_filename: str):
@@ -239,7 +338,7 @@ class CalibrationWorker(QObject):
         settings_path = PROJECT_ROOT / "configs" / "settings.yaml"
         try:
             with settings_path.open('r', encoding='utf-8') as f:
-                settings_data = yaml.safe_load(f) or {}
+                settings_data = yaml.load(f, Loader=SafeLoader) or {}
 
             if settings_data.get("active_calibration_profile") == new_profile_filename:
                 logger.info(f"校准线程：active_calibration_profile in {settings_path.name} is already set to: {new_profile_filename}")
@@ -248,7 +347,7 @@ class CalibrationWorker(QObject):
             settings_data["active_calibration_profile"] = new_profile_filename
             
             with settings_path.open('w', encoding='utf-8') as f:
-                yaml.dump(settings_data, f, allow_unicode=True, sort_keys=False, indent=2)
+                yaml.dump(settings_data, f, Dumper=SafeDumper, allow_unicode=True, sort_keys=False, indent=2)
             
             logger.info(f"校准线程：Updated active_calibration_profile in {settings_path.name} to: {new_profile_filename}")
         
@@ -265,9 +364,10 @@ class CalibrationWorker(QObject):
             engine = MumuCaptureEngine(self.config)
             engine.start()
             logger.info(f"校准线程：引擎启动成功，分辨率: {engine.width}x{engine.height}")
+            save_cached_resolution(self.config.mumu_instance_index, engine.width, engine.height)
 
             def on_progress(p: float):
-                self.calibration_progress.emit(p)
+                self.signals.calibration_progress.emit(p)
 
             calibration_result = run_calibration(engine, progress_callback=on_progress)
             
@@ -279,44 +379,104 @@ class CalibrationWorker(QObject):
             # Automatically update active_calibration_profile in settings.yaml
             self._update_active_profile_in_settings(saved_path.name)
             
-            self.calibration_finished.emit(str(saved_path))
+            self.signals.calibration_finished.emit(str(saved_path))
 
         except Exception as e:
             logger.critical(f"校准过程中发生严重错误: {e}", exc_info=True)
-            self.calibration_failed.emit(str(e))
+            self.signals.calibration_failed.emit(str(e))
         finally:
             if engine:
                 engine.stop()
             logger.info("校准线程结束。")
 
 
-class FrameDataWorker(QObject):
+class YamlIOSignals(QObject):
+    """YamlIOWorker 的信号。"""
+    loaded = Signal(dict)      # {文件名: 文件内容}
+    saved = Signal(bool, str)  # (是否成功, 错误信息)
+
+
+class YamlIOWorker(QRunnable):
+    """
+    在线程池中读取或写入 YAML 配置文件，避免阻塞 UI 线程。
+    传入 `load_paths` 时读取这些文件并发送 `loaded`，传入 `save_data` ({路径: 数据}) 时写入并发送 `saved`。
+    """
+
+    def __init__(self, load_paths=None, save_data=None):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.signals = YamlIOSignals()
+        self.load_paths = load_paths or []
+        self.save_data = save_data or {}
+
+    def run(self):
+        if self.save_data:
+            self._save()
+        else:
+            self._load()
+
+    def _load(self):
+        results = {}
+        for path in self.load_paths:
+            try:
+                if path.exists():
+                    with open(path, 'r', encoding='utf-8') as f:
+                        results[path.name] = yaml.load(f, Loader=SafeLoader) or {}
+            except Exception as e:
+                logger.error(f"无法加载设置 {path.name}: {e}")
+        self.signals.loaded.emit(results)
+
+    def _save(self):
+        try:
+            for path, data in self.save_data.items():
+                with open(path, 'w', encoding='utf-8') as f:
+                    yaml.dump(data, f, Dumper=SafeDumper, allow_unicode=True, sort_keys=False)
+        except Exception as e:
+            self.signals.saved.emit(False, str(e))
+            return
+        self.signals.saved.emit(True, "")
+
+
+class FrameDataSignals(QObject):
+    """FrameDataWorker 的信号。"""
+    new_frame_data = Signal(FrameData)
+
+
+class FrameDataWorker(QRunnable):
     """从 DoubleSharedBuffer 获取帧数据并发送信号。"""
-    new_frame_data = Signal(object)  # 发送 FrameData 对象
+    # 每个间隔最多发送一次最新的帧数据，悬浮窗只显示数字，30 Hz 已经足够
+    POLL_INTERVAL = 1 / 30
 
     def __init__(self, frame_ipc_params):
         super().__init__()
+        self.setAutoDelete(False)
+        self.signals = FrameDataSignals()
         self.frame_ipc_params = frame_ipc_params
         self.frame_data_buffer = None
-        self._is_stopped = False
+        self._stop_event = threading.Event()
 
     def run(self):
         self.frame_data_buffer = DoubleSharedBuffer(**self.frame_ipc_params, create=False)
         logger.info("FrameDataWorker 已连接到 DoubleSharedBuffer。")
-        while not self._is_stopped:
-            try:
-                data = self.frame_data_buffer.get()
-                if data and data.total_frames > 0:
-                    self.new_frame_data.emit(data)
-                # 短暂休眠以避免CPU空转
-                time.sleep(0.01)
-            except Exception as e:
-                logger.error(f"FrameDataWorker 发生错误: {e}")
-                break
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    # 两次轮询之间发布的多个状态只会合并为最新的一个
+                    data = self.frame_data_buffer.get_latest()
+                    if data and data.total_frames > 0:
+                        self.signals.new_frame_data.emit(data)
+                except Exception as e:
+                    logger.error(f"FrameDataWorker 发生错误: {e}")
+                    break
+                # 等待下一个刷新周期，stop() 会立即唤醒
+                self._stop_event.wait(self.POLL_INTERVAL)
+        finally:
+            # 连接由运行它的线程自己关闭，stop() 的调用方无需等待 run() 返回
+            self.close()
         logger.info("FrameDataWorker 已停止。")
 
     def stop(self):
-        self._is_stopped = True
+        self._stop_event.set()
 
     def close(self):
         """
@@ -328,71 +488,91 @@ class FrameDataWorker(QObject):
             logger.info("FrameDataWorker 已关闭其 DoubleSharedBuffer 连接。")
 
 
-class CommanderEventWorker(QObject):
-    """从 Commander 进程的队列中获取事件并发送信号。"""
-    new_event = Signal(dict)
-
-    def __init__(self, queue: multiprocessing.Queue):
-        super().__init__()
-        self.queue = queue
-        self._is_stopped = False
-
-    def run(self):
-        logger.info("CommanderEventWorker 已启动。")
-        while not self._is_stopped:
-            try:
-                event = self.queue.get(timeout=0.1)
-                self.new_event.emit(event)
-            except Exception:
-                continue
-        logger.info("CommanderEventWorker 已停止。")
+class BackendHubSignals(QObject):
+    """BackendHub 的信号。"""
+    logs = Signal(list)
+    commander_events = Signal(list)
+    recorder_events = Signal(list)
+    # 读取某个事件通道出错时发出，参数为通道名 ("commander" / "recorder")
+    channel_error = Signal(str)
 
-    def stop(self):
-        self._is_stopped = True
 
+class BackendHub(QRunnable):
+    """
+    在同一个线程中汇总日志队列和 Commander / Recorder 的事件环形缓冲区，并批量发送信号。
+    取代每个通道各占一个 QThread 的做法：日志队列通过 `multiprocessing.connection.wait` 阻塞等待
+    (Windows 上同样适用)，环形缓冲区则在每次唤醒时轮询一次。
+    """
+    # 没有新日志时的最长等待时间，同时也是环形缓冲区的轮询间隔
+    POLL_INTERVAL = 0.01
+    # 每次唤醒时每个通道最多取出的条数，突发时剩余部分留到下一次唤醒，避免单个批次过大卡住 UI 线程
+    MAX_BATCH = 64
 
-class RecorderEventWorker(QObject):
-    """从 Recorder 进程的队列中获取新动作并发送信号。"""
-    new_action = Signal(dict)
-
-    def __init__(self, queue: multiprocessing.Queue):
-        super().__init__()
-        self.queue = queue
-        self._is_stopped = False
-
-    def run(self):
-        logger.info("RecorderEventWorker 已启动。")
-        while not self._is_stopped:
-            try:
-                action = self.queue.get(timeout=0.1)
-                self.new_action.emit(action)
-            except Exception:
-                continue
-        logger.info("RecorderEventWorker 已停止。")
-
-    def stop(self):
-        self._is_stopped = True
-
-
-class LogWorker(QObject):
-    """从日志队列中获取日志记录并发送信号。"""
-    new_log = Signal(str)
-
-    def __init__(self, queue: Queue):
+    def __init__(self, log_queue: Queue):
         super().__init__()
-        self.queue = queue
-        self._is_stopped = False
+        self.setAutoDelete(False)
+        self.signals = BackendHubSignals()
+        self.log_queue = log_queue
+        self._commander_ring = None
+        self._recorder_ring = None
+        # 保护环形缓冲区的挂接/卸下，保证 detach_channels() 返回后不会再读取旧的缓冲区
+        self._channel_lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def attach_commander(self, ring: SpscRingBuffer):
+        with self._channel_lock:
+            self._commander_ring = ring
+
+    def attach_recorder(self, ring: SpscRingBuffer):
+        with self._channel_lock:
+            self._recorder_ring = ring
+
+    def detach_channels(self):
+        with self._channel_lock:
+            self._commander_ring = None
+            self._recorder_ring = None
 
     def run(self):
-        logger.info("LogWorker 已启动。")
-        while not self._is_stopped:
-            try:
-                record = self.queue.get(timeout=0.1)
-                if record:
-                    self.new_log.emit(record.getMessage())
-            except Exception:
-                continue
-        logger.info("LogWorker 已停止。")
+        logger.info("BackendHub 已启动。")
+        log_reader = self.log_queue._reader
+        while not self._stop_event.is_set():
+            if wait([log_reader], timeout=self.POLL_INTERVAL):
+                self._emit_logs()
+            with self._channel_lock:
+                if self._commander_ring:
+                    self._emit_ring(self._commander_ring, self.signals.commander_events, "commander")
+                if self._recorder_ring:
+                    self._emit_ring(self._recorder_ring, self.signals.recorder_events, "recorder")
+        logger.info("BackendHub 已停止。")
+
+    def _emit_logs(self):
+        records = []
+        try:
+            while len(records) < self.MAX_BATCH:
+                records.append(self.log_queue.get_nowait())
+        except Empty:
+            pass
+        messages = [record.getMessage() for record in records if record]
+        if messages:
+            self.signals.logs.emit(messages)
+
+    def _emit_ring(self, ring: SpscRingBuffer, signal, channel: str):
+        """
+        取出一个环形缓冲区中的数据并发送信号。
+        读取出错时丢弃缓冲区中剩余的数据，与生产者重新同步并继续使用该通道，同时通过 `channel_error` 通知界面。
+        """
+        items = []
+        try:
+            ring.pop_batch(items, max_items=self.MAX_BATCH)
+        except Exception as e:
+            discarded = ring.discard_all()
+            logger.error(f"BackendHub 读取 {channel} 事件缓冲区时发生错误: {e}，已丢弃 {discarded} 字节未读数据并重新同步。")
+            self.signals.channel_error.emit(channel)
+        # 出错前已经成功解析的数据仍然发送出去
+        if items:
+            signal.emit(items)
 
     def stop(self):
-        self._is_stopped = True
\ No newline at end of file
+        self._stop_event.set()
+        # 放入一个哨兵，让正在等待日志队列的 run() 立即醒来，无需等到超时
+        self.log_queue.put(None)
\ No newline at end of file
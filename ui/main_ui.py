@@ -1,26 +1,22 @@
 import sys
-import os
 import json
-import gc
-import contextlib
-import yaml
 
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QTabWidget, QTextEdit,
-    QComboBox, QPushButton, QLineEdit, QTableWidget, QProgressBar, QListWidget,
-    QTableWidgetItem, QAbstractItemView, QHeaderView, QLabel, QMessageBox, QFormLayout, QGroupBox, QScrollArea,
+    QComboBox, QPushButton, QLineEdit, QTableView, QProgressBar, QListWidget,
+    QAbstractItemView, QHeaderView, QLabel, QMessageBox, QFormLayout, QGroupBox, QScrollArea,
     QListWidgetItem
 )
-from PySide6.QtGui import QScreen, QMouseEvent, QCloseEvent, QColor, QTextOption, QFont # Added QFont
-from PySide6.QtCore import Qt, QPoint, QThread, Signal
+from PySide6.QtGui import QScreen, QMouseEvent, QCloseEvent, QColor, QTextOption, QFont, QTextCursor # Added QFont
+from PySide6.QtCore import Qt, QPoint, QItemSelectionModel, QThreadPool, QSignalBlocker, Signal, QTimer, QAbstractTableModel, QModelIndex, QFileSystemWatcher
 
 from app.core.config import PROJECT_ROOT
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+from app.analysis.plan_loader import format_action_summary
 from ui.backend_connector import (
-    BackendManager, FrameDataWorker, CommanderEventWorker, 
-    RecorderEventWorker, LogWorker, CalibrationWorker
+    BackendManager, FrameDataWorker, BackendHub, CalibrationWorker, YamlIOWorker
 )
 
 class FloatingOverlay(QWidget):
@@ -36,13 +32,13 @@ class FloatingOverlay(QWidget):
         """)
         layout = QVBoxLayout(self)
         layout.setContentsMargins(10, 10, 10, 10)
-        self.total_frames_label = QLabel("总帧数: -")
-        self.cycle_label = QLabel("周期: -")
-        self.logical_frame_label = QLabel("逻辑帧: -/-")
-        layout.addWidget(self.total_frames_label)
-        layout.addWidget(self.cycle_label)
-        layout.addWidget(self.logical_frame_label)
+        # 三行信息共用一个标签，每次更新只触发一次重绘
+        self.info_label = QLabel("总帧数: -\n周期: -\n逻辑帧: -/-")
+        self.info_label.setTextFormat(Qt.TextFormat.PlainText)
+        layout.addWidget(self.info_label)
         self.drag_position = QPoint()
+        # 上一次显示的内容，数据没有变化时跳过 setText 和重绘
+        self._last_key = None
 
     def mousePressEvent(self, event: QMouseEvent):
         if event.button() == Qt.MouseButton.LeftButton:
@@ -56,29 +52,156 @@ class FloatingOverlay(QWidget):
 
     def update_data(self, frame_data):
         if frame_data:
-            self.total_frames_label.setText(f"总帧数: {frame_data.total_frames}")
-            self.cycle_label.setText(f"周期: {frame_data.cycle_index}")
-            self.logical_frame_label.setText(f"逻辑帧: {frame_data.logical_frame + 1}/{frame_data.total_frames_in_cycle}")
+            key = (frame_data.total_frames, frame_data.cycle_index,
+                   frame_data.logical_frame, frame_data.total_frames_in_cycle)
+            if key == self._last_key:
+                return
+            self._last_key = key
+            self.info_label.setText(
+                f"总帧数: {frame_data.total_frames}\n"
+                f"周期: {frame_data.cycle_index}\n"
+                f"逻辑帧: {frame_data.logical_frame + 1}/{frame_data.total_frames_in_cycle}"
+            )
+
+class RecordActionModel(QAbstractTableModel):
+    """
+    录制表格的数据模型。录制到的动作按批次整体插入，不再为每个单元格创建 QTableWidgetItem。
+    只有"触发帧"和"备注"两列可编辑，其余列只读并以灰色背景提示。
+    """
+    HEADERS = ["触发帧", "动作类型", "参数", "备注"]
+    EDITABLE_COLUMNS = (0, 3)
+    READ_ONLY_COLOR = QColor(240, 240, 240)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._actions = []
+        # 每行各列的显示文本，在插入时格式化一次，绘制时直接返回
+        self._rows = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._actions)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        column = index.column()
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return self._rows[index.row()][column]
+        if role == Qt.ItemDataRole.BackgroundRole and column not in self.EDITABLE_COLUMNS:
+            return self.READ_ONLY_COLOR
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and index.column() in self.EDITABLE_COLUMNS:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        row, column = index.row(), index.column()
+        action = self._actions[row]
+        if column == 0:
+            try:
+                action['trigger_frame'] = int(value)
+            except (TypeError, ValueError):
+                return False
+            text = str(action['trigger_frame'])
+        elif column == 3:
+            action['comment'] = text = str(value)
+        else:
+            return False
+        # 只更新被编辑的单元格，参数列的显示文本保持插入时的结果，不再重新序列化
+        cells = list(self._rows[row])
+        cells[column] = text
+        self._rows[row] = tuple(cells)
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def append_actions(self, actions):
+        """在表格末尾一次性插入一批动作。"""
+        if not actions:
+            return
+        first = len(self._actions)
+        self.beginInsertRows(QModelIndex(), first, first + len(actions) - 1)
+        for action in actions:
+            action = dict(action)
+            self._actions.append(action)
+            self._rows.append(self._format_row(action))
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self._actions.clear()
+        self._rows.clear()
+        self.endResetModel()
+
+    @staticmethod
+    def _format_row(action):
+        return (
+            str(action.get('trigger_frame', '')),
+            action.get('action_type', ''),
+            action.get('params_text') or json.dumps(action.get('params', {})),
+            action.get('comment', ''),
+        )
+
+    def actions(self):
+        """返回表格中 (可能已被用户编辑过的) 所有动作。"""
+        return [
+            {
+                "trigger_frame": action.get('trigger_frame'),
+                "action_type": action.get('action_type', ''),
+                "params": action.get('params', {}),
+                "comment": action.get('comment', ''),
+            }
+            for action in self._actions
+        ]
+
 
 class MainControlPanel(QMainWindow):
     def __init__(self):
         super().__init__()
+        # QFont 需要在 QApplication 创建之后构造，因此放在实例上
+        self._mono_font = QFont("Courier New", 10)
         self.setWindowTitle("控制面板")
         self.resize(300, 600)
 
         self.backend_manager = BackendManager()
+        # 后台 worker 都在这个线程池中运行。BackendHub 和 FrameDataWorker 会长期占用线程，
+        # 因此使用按 worker 数量配置的独立线程池，而不是线程数可能更少的全局线程池。
+        # 同一时刻最多运行 BackendHub、FrameDataWorker/CalibrationWorker (二者互斥) 和一个 YamlIOWorker
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(3)
+        # 正在运行、需要在退出时通知停止的 worker
+        self._active_workers = set()
+        QApplication.instance().aboutToQuit.connect(self._stop_active_workers)
         self.is_running = False
         self.is_recording = False
         self.is_calibrating = False
+        # 本次录制是否已经提示过录制事件丢失
+        self._record_channel_warned = False
 
         # Added new members for action list management
         self.current_action_item = None
-        self.plan_loaded_for_ui = False
+        # 动作列表中的条目，与计划中的动作组按下标一一对应，高亮时无需再经由 action_list.item() 查找
+        self._action_items: list[QListWidgetItem] = []
+        # 上一次应用到控件上的 (is_running, is_recording, is_calibrating)
+        self._last_states = None
 
         self._init_ui()
         self._connect_signals()
         self._setup_logging()
         self._populate_plans()
+        self._watch_plans_dir()
 
         self.overlay = FloatingOverlay()
         self.overlay.show()
@@ -98,11 +221,21 @@ class MainControlPanel(QMainWindow):
         self._create_run_tab()
         self._create_record_tab()
         self._create_calibrate_tab()
-        self._create_settings_tab()
+        # 设置页在第一次切换到该页时才构建并读取配置文件，启动时不再访问磁盘
+        self._settings_built = False
         self.log_area = QTextEdit()
         self.log_area.setReadOnly(True)
+        # 限制日志行数，避免长时间运行后文档无限增长
+        self.log_area.document().setMaximumBlockCount(5000)
         main_layout.addWidget(self.log_area)
 
+        # 日志先进入缓冲区，由定时器每 50ms 最多写入一次，避免日志突发时每条都触发一次重排
+        self._log_buf = []
+        self._log_timer = QTimer(self)
+        self._log_timer.setSingleShot(True)
+        self._log_timer.setInterval(50)
+        self._log_timer.timeout.connect(self._flush_log)
+
     def _create_run_tab(self):
         layout = QVBoxLayout(self.run_tab)
         run_top_layout = QHBoxLayout()
@@ -136,9 +269,9 @@ class MainControlPanel(QMainWindow):
             QListWidget::item:hover {
                 background-color: #e6f7ff;
             }
-            QListWidget::item:selected { /* Added for completeness, though selection is disabled */
-                background-color: #aaddff;
-                color: black;
+            QListWidget::item:selected { /* 当前正在执行的动作，由程序选中，用户无法手动选择 */
+                background-color: #3498db;
+                color: white;
             }
         """)
         self.action_list.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection) # Disable selection
@@ -151,9 +284,15 @@ class MainControlPanel(QMainWindow):
         layout.addWidget(self.plan_filename_input)
         self.start_record_button = QPushButton("⏺️ 开始录制")
         layout.addWidget(self.start_record_button)
-        self.record_table = QTableWidget()
-        self.record_table.setColumnCount(4)
-        self.record_table.setHorizontalHeaderLabels(["触发帧", "动作类型", "参数", "备注"])
+        self.record_model = RecordActionModel(self)
+        # 录制到的动作先暂存，由定时器每 50ms 合并为一次插入
+        self._pending_actions = []
+        self._record_flush_timer = QTimer(self)
+        self._record_flush_timer.setSingleShot(True)
+        self._record_flush_timer.setInterval(50)
+        self._record_flush_timer.timeout.connect(self._flush_recorded_actions)
+        self.record_table = QTableView()
+        self.record_table.setModel(self.record_model)
         self.record_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.record_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         layout.addWidget(self.record_table)
@@ -194,39 +333,55 @@ class MainControlPanel(QMainWindow):
 
         self.save_settings_button = QPushButton("💾 保存设置")
         layout.addWidget(self.save_settings_button)
+        self.save_settings_button.clicked.connect(self._save_settings)
+        # 配置读取完成前表单为空，此时保存会清空配置文件
+        self.save_settings_button.setEnabled(False)
 
         layout.addStretch(1)
 
-        self._load_settings_to_form(PROJECT_ROOT / 'configs' / 'mumu.yaml', mumu_layout, self.mumu_config_edits)
-        self._load_settings_to_form(PROJECT_ROOT / 'configs' / 'settings.yaml', settings_layout, self.settings_config_edits)
-
-    def _load_settings_to_form(self, path, layout, edits_dict):
-        try:
-            if path.exists():
-                with open(path, 'r', encoding='utf-8') as f:
-                    data = yaml.safe_load(f)
-                for key, value in data.items():
-                    label = QLabel(key)
-                    edit = QLineEdit(str(value))
-                    layout.addRow(label, edit)
-                    edits_dict[key] = edit
-        except Exception as e:
-            self.append_log(f"无法加载设置 {path.name}: {e}")
+        # 配置文件在线程池中读取，读取完成后再填充表单
+        self._settings_forms = {
+            'mumu.yaml': (mumu_layout, self.mumu_config_edits),
+            'settings.yaml': (settings_layout, self.settings_config_edits),
+        }
+        self._settings_loader = YamlIOWorker(load_paths=[PROJECT_ROOT / 'configs' / name for name in self._settings_forms])
+        self._settings_loader.signals.loaded.connect(self._on_settings_loaded)
+        self._pool.start(self._settings_loader)
+
+    def _on_settings_loaded(self, results):
+        for name, data in results.items():
+            layout, edits_dict = self._settings_forms[name]
+            self._load_settings_to_form(data, layout, edits_dict)
+        self.save_settings_button.setEnabled(True)
+
+    def _load_settings_to_form(self, data, layout, edits_dict):
+        for key, value in data.items():
+            label = QLabel(key)
+            edit = QLineEdit(str(value))
+            layout.addRow(label, edit)
+            edits_dict[key] = edit
 
     def _save_settings(self):
-        try:
-            self._save_settings_from_form(PROJECT_ROOT / 'configs' / 'mumu.yaml', self.mumu_config_edits)
-            self._save_settings_from_form(PROJECT_ROOT / 'configs' / 'settings.yaml', self.settings_config_edits)
-            
+        # 表单内容在 UI 线程中读取，文件写入交给线程池，完成前禁用保存按钮
+        self.save_settings_button.setEnabled(False)
+        self._settings_saver = YamlIOWorker(save_data={
+            PROJECT_ROOT / 'configs' / 'mumu.yaml': self._collect_form_data(self.mumu_config_edits),
+            PROJECT_ROOT / 'configs' / 'settings.yaml': self._collect_form_data(self.settings_config_edits),
+        })
+        self._settings_saver.signals.saved.connect(self._on_settings_saved)
+        self._pool.start(self._settings_saver)
+
+    def _on_settings_saved(self, ok, error):
+        self.save_settings_button.setEnabled(True)
+        if ok:
             QMessageBox.information(self, "成功", "设置已保存。")
             self.backend_manager.reload_config()
             self.append_log("配置已重新加载。")
+        else:
+            QMessageBox.critical(self, "失败", f"保存设置失败: {error}")
+            self.append_log(f"保存设置失败: {error}")
 
-        except Exception as e:
-            QMessageBox.critical(self, "失败", f"保存设置失败: {e}")
-            self.append_log(f"保存设置失败: {e}")
-
-    def _save_settings_from_form(self, path, edits_dict):
+    def _collect_form_data(self, edits_dict):
         data = {}
         for key, edit in edits_dict.items():
             # Try to convert back to original type (int, float)
@@ -238,18 +393,31 @@ class MainControlPanel(QMainWindow):
                     data[key] = int(val_str)
             except ValueError:
                 data[key] = val_str # Keep as string if conversion fails
-
-        with open(path, 'w', encoding='utf-8') as f:
-            yaml.dump(data, f, allow_unicode=True, sort_keys=False)
+        return data
 
     def _setup_logging(self):
         log_queue = self.backend_manager.setup_log_queue()
-        self.log_thread = QThread()
-        self.log_worker = LogWorker(log_queue)
-        self.log_worker.moveToThread(self.log_thread)
-        self.log_worker.new_log.connect(self.append_log)
-        self.log_thread.started.connect(self.log_worker.run)
-        self.log_thread.start()
+        # 日志与 Commander / Recorder 事件共用一个后台线程
+        self.backend_hub = BackendHub(log_queue)
+        # 高频信号总是从工作线程发出，显式使用排队连接，省去每次发送时对连接类型的判断
+        queued = Qt.ConnectionType.QueuedConnection
+        self.backend_hub.signals.logs.connect(self._append_logs, queued)
+        self.backend_hub.signals.commander_events.connect(self._on_commander_events, queued)
+        self.backend_hub.signals.recorder_events.connect(self._on_new_actions_recorded, queued)
+        self.backend_hub.signals.channel_error.connect(self._on_channel_error)
+        self._start_worker(self.backend_hub)
+
+    def _start_worker(self, worker):
+        self._active_workers.add(worker)
+        self._pool.start(worker)
+
+    def _stop_worker(self, worker):
+        worker.stop()
+        self._active_workers.discard(worker)
+
+    def _stop_active_workers(self):
+        for worker in list(self._active_workers):
+            self._stop_worker(worker)
 
     def _populate_plans(self, select_plan_name=None):
         """
@@ -264,10 +432,7 @@ class MainControlPanel(QMainWindow):
             current_selection = self.plan_selector.currentText()
             
             self.plan_selector.clear()
-            plans_dir = PROJECT_ROOT / 'plans'
-            if plans_dir.is_dir():
-                plan_files = sorted([f.replace('.yaml', '') for f in os.listdir(plans_dir) if f.endswith('.yaml')])
-                self.plan_selector.addItems(plan_files)
+            self.plan_selector.addItems(self._list_plan_names())
 
             # Determine what to select after refresh
             target_selection = select_plan_name or current_selection
@@ -281,36 +446,44 @@ class MainControlPanel(QMainWindow):
         except Exception as e:
             self.append_log(f"无法加载计划列表: {e}")
 
+    def _list_plan_names(self):
+        """返回 plans 目录下所有 .yaml 计划的名称 (已排序)。"""
+        plans_dir = PROJECT_ROOT / 'plans'
+        if not plans_dir.is_dir():
+            return []
+        return sorted(path.stem for path in plans_dir.glob('*.yaml'))
+
+    def _watch_plans_dir(self):
+        """监听 plans 目录，只有目录内容实际变化时才刷新下拉框。"""
+        self._plans_watcher = QFileSystemWatcher(self)
+        plans_dir = PROJECT_ROOT / 'plans'
+        if plans_dir.is_dir():
+            self._plans_watcher.addPath(str(plans_dir))
+        self._plans_watcher.directoryChanged.connect(self._refresh_plans)
+
+    def _refresh_plans(self, _path=None):
+        current_names = [self.plan_selector.itemText(i) for i in range(self.plan_selector.count())]
+        if self._list_plan_names() != current_names:
+            self._populate_plans()
+
     def _connect_signals(self):
         self.start_run_button.clicked.connect(self._handle_run_clicked)
         self.start_record_button.clicked.connect(self._handle_record_clicked)
         self.start_calibrate_button.clicked.connect(self._handle_calibrate_clicked)
-        self.save_settings_button.clicked.connect(self._save_settings)
         self.tabs.currentChanged.connect(self._on_tab_changed)
+        self.backend_manager.plan_loaded.connect(self._populate_action_list)
         self.refresh_plans_button.clicked.connect(self._populate_plans)
 
     def _start_background_workers(self):
-        self.frame_data_thread = QThread()
         self.frame_data_worker = FrameDataWorker(self.backend_manager.frame_ipc_params)
-        self.frame_data_worker.moveToThread(self.frame_data_thread)
-        self.frame_data_worker.new_frame_data.connect(self.overlay.update_data)
-        self.frame_data_thread.started.connect(self.frame_data_worker.run)
-        self.frame_data_thread.start()
+        self.frame_data_worker.signals.new_frame_data.connect(self.overlay.update_data, Qt.ConnectionType.QueuedConnection)
+        self._start_worker(self.frame_data_worker)
 
     def _stop_background_workers(self):
         if hasattr(self, 'frame_data_worker'):
-            self.frame_data_worker.stop()
-            self.frame_data_worker.close()
-            self.frame_data_thread.quit()
-            self.frame_data_thread.wait()
-        if hasattr(self, 'commander_worker'):
-            self.commander_worker.stop()
-            self.commander_thread.quit()
-            self.commander_thread.wait()
-        if hasattr(self, 'recorder_worker'):
-            self.recorder_worker.stop()
-            self.recorder_thread.quit()
-            self.recorder_thread.wait()
+            self._stop_worker(self.frame_data_worker)
+        if hasattr(self, 'backend_hub'):
+            self.backend_hub.detach_channels()
 
     def _handle_run_clicked(self):
         if self.is_running:
@@ -322,25 +495,21 @@ class MainControlPanel(QMainWindow):
                 return
             self.backend_manager.start_run_mode(plan_name)
             self._start_background_workers()
-            self.commander_thread = QThread()
-            self.commander_worker = CommanderEventWorker(self.backend_manager.commander_event_queue)
-            self.commander_worker.moveToThread(self.commander_thread)
-            self.commander_worker.new_event.connect(self._on_commander_event)
-            self.commander_thread.started.connect(self.commander_worker.run)
-            self.commander_thread.start()
+            self.backend_hub.attach_commander(self.backend_manager.commander_event_queue)
             self.is_running = True
-            self.plan_loaded_for_ui = False # Reset flag for new plan load
             self.start_run_button.setText("⏹️ 停止运行")
             self._update_ui_states()
 
     def _stop_run(self):
-        self.backend_manager.stop_all_processes()
+        # 先停止读取共享内存的 worker，再停止后台进程，下次启动时 backend 才能安全地复位这些共享内存
         self._stop_background_workers()
+        self.backend_manager.stop_all_processes()
         self.is_running = False
         self.start_run_button.setText("▶️ 开始运行")
         
         # Reset UI elements
         self.action_list.clear()
+        self._action_items = []
         if hasattr(self, 'run_status_label'):
             self.run_status_label.setText("状态: 空闲")
         self.current_action_item = None # Clear current highlighted item
@@ -355,15 +524,12 @@ class MainControlPanel(QMainWindow):
             if not plan_name:
                 QMessageBox.warning(self, "提示", "请输入计划文件名。")
                 return
-            self.record_table.setRowCount(0)
+            self._pending_actions.clear()
+            self.record_model.clear()
+            self._record_channel_warned = False
             self.backend_manager.start_record_mode(plan_name)
             self._start_background_workers()
-            self.recorder_thread = QThread()
-            self.recorder_worker = RecorderEventWorker(self.backend_manager.recorder_event_queue)
-            self.recorder_worker.moveToThread(self.recorder_thread)
-            self.recorder_worker.new_action.connect(self._on_new_action_recorded)
-            self.recorder_thread.started.connect(self.recorder_worker.run)
-            self.recorder_thread.start()
+            self.backend_hub.attach_recorder(self.backend_manager.recorder_event_queue)
             self.is_recording = True
             self.start_record_button.setText("⏹️ 结束录制")
             self._update_ui_states()
@@ -377,8 +543,8 @@ class MainControlPanel(QMainWindow):
         final_actions = self._get_actions_from_table()
         self.backend_manager.save_final_recorded_plan(plan_name, final_actions)
 
-        self.backend_manager.stop_all_processes()
         self._stop_background_workers()
+        self.backend_manager.stop_all_processes()
         self.is_recording = False
         self.start_record_button.setText("⏺️ 开始录制")
         self._update_ui_states()
@@ -393,61 +559,67 @@ class MainControlPanel(QMainWindow):
         self.start_calibrate_button.setText("校准中...")
         self._update_ui_states()
 
-        self.calib_thread = QThread()
         self.calib_worker = self.backend_manager.create_calibration_worker()
-        self.calib_worker.moveToThread(self.calib_thread)
+        self.calib_worker.signals.calibration_progress.connect(self._update_calibration_progress)
+        self.calib_worker.signals.calibration_finished.connect(self._on_calibration_finished)
+        self.calib_worker.signals.calibration_failed.connect(self._on_calibration_failed)
+        self._pool.start(self.calib_worker)
 
-        self.calib_worker.calibration_progress.connect(self._update_calibration_progress)
-        self.calib_worker.calibration_finished.connect(self._on_calibration_finished)
-        self.calib_worker.calibration_failed.connect(self._on_calibration_failed)
-        self.calib_thread.started.connect(self.calib_worker.run)
-        self.calib_thread.finished.connect(self.calib_thread.deleteLater)
+    def append_log(self, text):
+        self._log_buf.append(text)
+        if not self._log_timer.isActive():
+            self._log_timer.start()
 
-        self.calib_thread.start()
+    def _append_logs(self, messages):
+        self._log_buf.extend(messages)
+        if not self._log_timer.isActive():
+            self._log_timer.start()
 
-    def append_log(self, text):
-        self.log_area.append(text)
+    def _flush_log(self):
+        if not self._log_buf:
+            return
+        # 使用独立的光标写入文档末尾，不会移动可见光标或打断用户的选择；
+        # 只有在用户原本就停留在底部时才跟随滚动
+        scroll_bar = self.log_area.verticalScrollBar()
+        at_bottom = scroll_bar.value() == scroll_bar.maximum()
+        cursor = QTextCursor(self.log_area.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText("\n".join(self._log_buf) + "\n")
+        self._log_buf.clear()
+        if at_bottom:
+            scroll_bar.setValue(scroll_bar.maximum())
+
+    @staticmethod
+    def _format_action_group_text(i, action_group):
+        actions = action_group.actions
+        comment = actions[0].comment if actions else ""
+        return f"#{i+1:<3} | Frame {action_group.trigger_frame:<5} | {comment} | {format_action_summary(action_group)}"
+
+    def _populate_action_list(self, plan):
+        """计划加载完成后，一次性将其填入运行页的动作列表。"""
+        texts = [self._format_action_group_text(i, action_group) for i, action_group in enumerate(plan)]
+        # 一次性添加所有条目，期间暂停重绘，并屏蔽逐条设置字体时触发的 itemChanged 等信号
+        blocker = QSignalBlocker(self.action_list)
+        self.action_list.setUpdatesEnabled(False)
+        try:
+            self.action_list.clear()
+            self.action_list.addItems(texts)
+            self._action_items = [self.action_list.item(i) for i in range(self.action_list.count())]
+            for item in self._action_items:
+                # Use a monospaced font for better alignment
+                item.setFont(self._mono_font)
+        finally:
+            self.action_list.setUpdatesEnabled(True)
+            blocker.unblock()
+
+    def _on_commander_events(self, events):
+        for event in events:
+            self._on_commander_event(event)
 
     def _on_commander_event(self, event):
         event_type = event.get('type')
         data = event.get('data', {})
 
-        # One-time load of the plan into the UI list when commander starts
-        if not self.plan_loaded_for_ui and self.backend_manager.plan:
-            self.action_list.clear()
-            plan = self.backend_manager.plan
-            # Use a monospaced font for better alignment
-            mono_font = QFont("Courier New", 10)
-            for i, action_group in enumerate(plan):
-                trigger_frame = action_group.trigger_frame
-                actions = action_group.actions
-                
-                action_details = []
-                for action in actions:
-                    detail = action.action_type.capitalize()
-                    if hasattr(action, 'params') and action.params:
-                        params_list = []
-                        for k, v in action.params.items():
-                            if isinstance(v, list) and len(v) == 2 and all(isinstance(x, (int, float)) for x in v):
-                                params_list.append(f"{k}:({v[0]},{v[1]})")
-                            elif isinstance(v, list) and len(v) == 4 and all(isinstance(x, (int, float)) for x in v):
-                                params_list.append(f"{k}:({v[0]},{v[1]})-({v[2]},{v[3]})")
-                            else:
-                                params_list.append(f"{k}:{v}")
-                        if params_list:
-                            detail += f" ({', '.join(params_list)})"
-                    action_details.append(detail)
-                
-                action_summary = "; ".join(action_details)
-                comment = getattr(actions[0], 'comment', '') if actions else ""
-                
-                item_text = f"#{i+1:<3} | Frame {trigger_frame:<5} | {comment} | {action_summary}"
-                
-                item = QListWidgetItem(item_text)
-                item.setFont(mono_font)
-                self.action_list.addItem(item)
-            self.plan_loaded_for_ui = True
-
         if event_type == 'state_change':
             if hasattr(self, 'run_status_label'):
                 self.run_status_label.setText(f"状态: {data.get('state')}")
@@ -455,66 +627,51 @@ class MainControlPanel(QMainWindow):
         elif event_type == 'executing_action':
             current_index = data.get('index', 0)
             
-            # Reset style of the previously highlighted item
-            if self.current_action_item:
-                self.current_action_item.setBackground(QColor("transparent"))
-                self.current_action_item.setForeground(QColor("black")) # Default text color
-
             # Highlight the new current item and scroll to it
-            if 0 <= current_index < self.action_list.count():
-                item = self.action_list.item(current_index)
-                if item:
-                    # A nice blue color for highlighting
-                    item.setBackground(QColor("#3498db"))
-                    item.setForeground(QColor("white"))
-                    self.action_list.scrollToItem(item, QAbstractItemView.ScrollHint.PositionAtCenter)
-                    self.current_action_item = item
-
-    def _on_new_action_recorded(self, action):
-        row_pos = self.record_table.rowCount()
-        self.record_table.insertRow(row_pos)
-
-        # 1. Create all QTableWidgetItem instances
-        item_frame = QTableWidgetItem(str(action.get('trigger_frame', '')))
-        item_type = QTableWidgetItem(action.get('action_type', ''))
-        item_params = QTableWidgetItem(json.dumps(action.get('params', {})))
-        item_comment = QTableWidgetItem(action.get('comment', ''))
-
-        # 2. Make 'Action Type' and 'Parameters' columns read-only
-        # Column 1: Action Type
-        # We take the default flags and remove the 'ItemIsEditable' flag
-        item_type.setFlags(item_type.flags() & ~Qt.ItemFlag.ItemIsEditable)
-        
-        # Column 2: Parameters
-        item_params.setFlags(item_params.flags() & ~Qt.ItemFlag.ItemIsEditable)
-        
-        # 3. (Optional but recommended) Give a visual cue that they are read-only
-        read_only_color = QColor(240, 240, 240) # A light gray
-        item_type.setBackground(read_only_color)
-        item_params.setBackground(read_only_color)
-
-        # 4. Set the items in the table
-        self.record_table.setItem(row_pos, 0, item_frame)
-        self.record_table.setItem(row_pos, 1, item_type)
-        self.record_table.setItem(row_pos, 2, item_params)
-        self.record_table.setItem(row_pos, 3, item_comment)
-
+            # 高亮通过选中状态和 ::item:selected 样式实现，切换时只需一次选择变更，无需逐项设置前景/背景色
+            if 0 <= current_index < len(self._action_items):
+                item = self._action_items[current_index]
+                if item is not self.current_action_item:
+                    self.action_list.setCurrentItem(item, QItemSelectionModel.SelectionFlag.ClearAndSelect)
+                self.action_list.scrollToItem(item, QAbstractItemView.ScrollHint.PositionAtCenter)
+                self.current_action_item = item
+
+    def _on_channel_error(self, channel):
+        if channel != "recorder":
+            # Commander 事件只用于显示状态和高亮，丢失部分事件不影响执行
+            self.append_log("Commander 事件读取出错，部分状态更新已丢失。")
+            return
+        self.append_log("录制事件读取出错，部分录制动作已丢失，保存的计划可能不完整。")
+        # 录制表格就是最终保存的计划，需要明确提示用户；同一次录制只弹窗一次
+        if self.is_recording and not self._record_channel_warned:
+            self._record_channel_warned = True
+            QMessageBox.warning(self, "录制数据丢失",
+                                "读取录制事件时出错，部分录制动作已丢失，保存的计划可能不完整。\n"
+                                "请检查录制表格，必要时手动补充或重新录制。")
+
+    def _on_new_actions_recorded(self, actions):
+        self._pending_actions.extend(actions)
+        if not self._record_flush_timer.isActive():
+            self._record_flush_timer.start()
+
+    def _flush_recorded_actions(self):
+        # 50ms 内到达的所有批次只触发一次行插入，结束后只滚动一次
+        if not self._pending_actions:
+            return
+        # 模型的信号不能屏蔽 (视图依赖它们更新)，这里只暂停视图的重绘
+        self.record_table.setUpdatesEnabled(False)
+        try:
+            self.record_model.append_actions(self._pending_actions)
+            self._pending_actions = []
+        finally:
+            self.record_table.setUpdatesEnabled(True)
         self.record_table.scrollToBottom()
 
     def _get_actions_from_table(self):
-        actions = []
-        for row in range(self.record_table.rowCount()):
-            trigger_frame = int(self.record_table.item(row, 0).text())
-            action_type = self.record_table.item(row, 1).text()
-            params = json.loads(self.record_table.item(row, 2).text())
-            comment = self.record_table.item(row, 3).text()
-            actions.append({
-                "trigger_frame": trigger_frame,
-                "action_type": action_type,
-                "params": params,
-                "comment": comment
-            })
-        return actions
+        # 先写入尚未刷新的动作，保证保存的计划是完整的
+        self._record_flush_timer.stop()
+        self._flush_recorded_actions()
+        return self.record_model.actions()
 
     def _update_calibration_progress(self, value):
         self.calibrate_progress_bar.setValue(int(value))
@@ -537,49 +694,53 @@ class MainControlPanel(QMainWindow):
         self._update_ui_states()
 
     def _update_ui_states(self):
-        is_any_task_running = self.is_running or self.is_recording or self.is_calibrating
+        # 控件状态只取决于这三个标志，没有变化时不重复设置，避免无谓的样式重算
+        states = (self.is_running, self.is_recording, self.is_calibrating)
+        if states == self._last_states:
+            return
+        self._last_states = states
 
-        # Update button enabled state
-        self.start_run_button.setEnabled(not is_any_task_running or self.is_running)
-        self.start_record_button.setEnabled(not is_any_task_running or self.is_recording)
-        self.start_calibrate_button.setEnabled(not is_any_task_running or self.is_calibrating)
+        is_any_task_running = self.is_running or self.is_recording or self.is_calibrating
 
-        # Update tab enabled state
-        self.tabs.setTabEnabled(0, not (self.is_recording or self.is_calibrating))
-        self.tabs.setTabEnabled(1, not (self.is_running or self.is_calibrating))
-        self.tabs.setTabEnabled(2, not (self.is_running or self.is_recording))
+        self.setUpdatesEnabled(False)
+        try:
+            # Update button enabled state
+            self.start_run_button.setEnabled(not is_any_task_running or self.is_running)
+            self.start_record_button.setEnabled(not is_any_task_running or self.is_recording)
+            self.start_calibrate_button.setEnabled(not is_any_task_running or self.is_calibrating)
+
+            # Update tab enabled state
+            self.tabs.setTabEnabled(0, not (self.is_recording or self.is_calibrating))
+            self.tabs.setTabEnabled(1, not (self.is_running or self.is_calibrating))
+            self.tabs.setTabEnabled(2, not (self.is_running or self.is_recording))
+        finally:
+            self.setUpdatesEnabled(True)
 
     def _on_tab_changed(self, index):
+        if not self._settings_built and self.tabs.widget(index) is self.settings_tab:
+            self._settings_built = True
+            self._create_settings_tab()
         self._update_ui_states()
 
     def closeEvent(self, event: QCloseEvent):
         self.append_log("正在关闭应用程序...")
         self.overlay.close()
         self._stop_background_workers()
-        self.backend_manager.stop_all_processes()
-        if hasattr(self, 'log_worker'):
-            self.log_worker.stop()
-            self.log_thread.quit()
-            self.log_thread.wait()
-        if hasattr(self, 'calib_thread') and self.calib_thread.isRunning():
-            self.calib_thread.quit()
-            self.calib_thread.wait()
-
-        self.append_log("正在进行最后的资源清理...")
-        with contextlib.suppress(BufferError):
-            gc.collect()
+        self.backend_manager.shutdown()
+        self._stop_active_workers()
+        # 等待所有 worker (包括尚未结束的校准任务) 退出
+        self._pool.waitForDone()
         event.accept()
 
     def _move_to_right_side(self):
-        try:
-            primary_screen = self.screen()
-            if primary_screen:
-                screen_geometry = primary_screen.availableGeometry()
-                x = screen_geometry.width() - self.width()
-                y = (screen_geometry.height() - self.height()) // 2
-                self.move(x, y)
-        except Exception as e:
-            self.append_log(f"无法移动窗口: {e}")
+        primary_screen = QApplication.primaryScreen()
+        if primary_screen is None:
+            return
+        # 可用区域可能不从 (0, 0) 开始 (例如任务栏在左侧或上方)，需要加上其偏移
+        screen_geometry = primary_screen.availableGeometry()
+        x = screen_geometry.x() + screen_geometry.width() - self.width()
+        y = screen_geometry.y() + (screen_geometry.height() - self.height()) // 2
+        self.move(x, y)
 
 def main():
     app = QApplication(sys.argv)